@@ -22,6 +22,8 @@ setup(
     url="https://github.com/macknowak/vrepsim",
     license="GNU General Public License v3 or later (GPLv3+)",
     packages=['vrepsim'],
+    package_data={'vrepsim': ['readout.lua']},
+    requires=['numpy'],
     classifiers=[
         'Development Status :: 1 - Planning',
         'Environment :: Console',
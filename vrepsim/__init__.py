@@ -15,21 +15,75 @@ which V-REP is installed):
   python/python/);
 - [remoteApi.so | remoteApi.dylib | remoteApi.dll] (original file in:
   V-REP_DIR/programming/remoteApiBindings/lib/lib/[32Bit | 64Bit]/).
+
+These files are loaded only when connecting to V-REP remote API server, so
+they are not required for importing V-REPSim or for replaying recorded data.
+
+V-REPSim also requires NumPy.
+
+Modules requiring Python 3 (dataset, pipeline, recorder, replay, sharedmem and
+vecenv, sharedmem requiring Python 3.8 or later) are imported only when first
+accessed, so that importing V-REPSim does not import their dependencies (e.g.,
+multiprocessing or concurrent.futures). Their classes and functions are
+available as attributes of the package only on Python 3.7 or later; on
+earlier versions of Python, they have to be imported from their modules.
 """
 
 __version__ = '0.4.0'
 __author__ = "Przemyslaw (Mack) Nowak"
 
+import importlib
 import sys
 import warnings
 
 if sys.version_info[0] == 2:
     warnings.warn("Support for Python 2 is deprecated.", DeprecationWarning)
 
+from .calculations import (CollisionObject, CollisionObjectArray,
+                           DistanceObject, DistanceObjectArray)
 from .collections import Collection
+from .feeds import ChangeFeed
+from .handlecache import HandleCache
 from .models import Model, PioneerBot
-from .objects import (Dummy, Motor, MotorArray, ProximitySensor,
-                      ProximitySensorArray, SceneObject, SensorArray,
-                      VisionSensor)
+from .objects import (Dummy, ForceSensor, ForceSensorArray, Motor, MotorArray,
+                      ProximitySensor, ProximitySensorArray, SceneObject,
+                      SensorArray, VisionSensor, VisionSensorArray,
+                      resolve_handles)
+from .parameters import ParameterBatch
+from .plans import ReadPlan, WritePlan
+from .playback import TrajectoryPlayer
+from .profiler import StepProfiler
+from .scheduler import StepScheduler
 from .simulator import Simulator, get_default_simulator
-from . import collections, models, nengo, objects, simulator
+from .snapshot import SceneSnapshot
+from . import (backend, calculations, collections, feeds, handlecache, models,
+               nengo, objects, parameters, plans, playback, profiler,
+               scheduler, simulator, snapshot)
+
+# Classes and functions of modules imported only when first accessed, together
+# with names of these modules
+_LAZY_NAMES = {
+    'DatasetWriter': 'dataset',
+    'FramePublisher': 'sharedmem',
+    'FrameReader': 'sharedmem',
+    'ImagePipeline': 'pipeline',
+    'PioneerEnv': 'vecenv',
+    'Recorder': 'recorder',
+    'ReplaySimulator': 'replay',
+    'VecEnv': 'vecenv',
+    'open_dataset': 'dataset'
+    }
+
+
+def __getattr__(name):
+    """Import module (or class or function of module) imported only when
+    first accessed.
+    """
+    if name in _LAZY_NAMES.values():
+        return importlib.import_module('.' + name, __name__)
+    if name in _LAZY_NAMES:
+        module = importlib.import_module('.' + _LAZY_NAMES[name], __name__)
+        value = globals()[name] = getattr(module, name)
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__,
+                                                                   name))
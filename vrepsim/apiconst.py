@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Constants of V-REP remote API.
+
+Constants of V-REP remote API provide the following constants, with the same
+names and values as in vrepConst module, so that backends providing V-REP
+remote API which do not require V-REP (e.g., replay of recorded data) can be
+used even if vrepConst module is not available:
+
+- constants related to return codes;
+- constants related to operation modes;
+- constants related to message header offsets;
+- constants related to scene objects;
+- constants related to parameters.
+
+Only constants used by V-REPSim are provided.
+"""
+
+# Return codes
+simx_return_ok = 0
+simx_return_novalue_flag = 1
+simx_return_timeout_flag = 2
+simx_return_illegal_opmode_flag = 4
+simx_return_remote_error_flag = 8
+simx_return_split_progress_flag = 16
+simx_return_local_error_flag = 32
+simx_return_initialize_error_flag = 64
+
+# Operation modes
+simx_opmode_oneshot = 0x000000
+simx_opmode_blocking = 0x010000
+simx_opmode_oneshot_wait = 0x010000
+simx_opmode_streaming = 0x020000
+simx_opmode_oneshot_split = 0x030000
+simx_opmode_streaming_split = 0x040000
+simx_opmode_discontinue = 0x050000
+simx_opmode_buffer = 0x060000
+simx_opmode_remove = 0x070000
+
+# Message header offsets
+simx_headeroffset_crc = 0
+simx_headeroffset_version = 2
+simx_headeroffset_message_id = 3
+simx_headeroffset_client_time = 7
+simx_headeroffset_server_time = 11
+simx_headeroffset_scene_id = 15
+simx_headeroffset_server_state = 17
+
+# Scene objects
+sim_handle_all = -2
+sim_handle_parent = -11
+sim_object_shape_type = 0
+sim_object_joint_type = 1
+sim_object_proximitysensor_type = 5
+sim_object_visionsensor_type = 9
+sim_object_forcesensor_type = 12
+sim_appobj_object_type = 109
+sim_appobj_collision_type = 110
+sim_appobj_distance_type = 111
+sim_scripttype_childscript = 1
+sim_scripttype_customizationscript = 6
+
+# Parameters
+sim_boolparam_waiting_for_trigger = 45
+sim_intparam_program_version = 1
+sim_intparam_dynamic_engine = 8
+sim_floatparam_simulation_time_step = 1
+sim_floatparam_dynamic_step_size = 3
+sim_jointfloatparam_velocity = 2012
+sim_stringparam_scene_path_and_name = 13
+sim_visionfloatparam_near_clipping = 1000
+sim_visionfloatparam_far_clipping = 1001
+sim_visionintparam_resolution_x = 1002
+sim_visionintparam_resolution_y = 1003
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Backends providing V-REP remote API.
+
+Backends providing V-REP remote API provide the following functionality:
+
+- accessing V-REP remote API of the active backend;
+- retrieving the active backend;
+- setting the active backend;
+- wrapping the active backend by a stack of wrappers (e.g., dispatching or
+  profiling V-REP remote API calls).
+
+V-REPSim accesses V-REP remote API through a proxy that forwards all attribute
+lookups to the active backend. By default, the active backend is the Python
+binding to V-REP remote API (vrep module), but any object providing the same
+functions and constants may be used instead, e.g., to serve recorded data.
+Since only one connection to V-REP remote API server may be established at a
+time, interface to V-REP remote API server activates its backend when
+connecting and restores the default backend when disconnecting.
+
+Wrappers of the active backend are kept on a stack, so that V-REP remote API
+is accessed through the outermost wrapper. Wrappers have to be removed in the
+reverse order of adding them, and the active backend cannot be replaced while
+wrapped. Each wrapper is added together with a function detaching it, which
+is called when interface to V-REP remote API server disconnects.
+
+The vrep module (which loads the native V-REP remote API library) is imported
+only when the default backend is first used, so that importing V-REPSim is
+fast and alternative backends work even if the vrep module is not available.
+"""
+
+_default_backend = None  # imported when first used
+_active_backend = None  # None denotes the default backend
+_wrappers = []  # wrappers with functions detaching them, outermost last
+
+
+class _BackendProxy(object):
+    """Proxy to V-REP remote API of the active backend."""
+
+    def __getattr__(self, name):
+        return getattr(get_backend(), name)
+
+    def __repr__(self):
+        if (_active_backend is None and _default_backend is None
+                and not _wrappers):
+            return "<V-REP remote API proxy to default backend (not loaded)>"
+        return "<V-REP remote API proxy to {!r}>".format(get_backend())
+
+
+vrep = _BackendProxy()
+
+
+def add_wrapper(wrapper, detach):
+    """Add wrapper of the active backend (wrapping the backend retrieved by
+    get_backend) as the outermost one, together with function detaching it.
+    """
+    _wrappers.append((wrapper, detach))
+
+
+def detach_wrappers():
+    """Detach all wrappers of the active backend, starting from the outermost
+    one.
+    """
+    while _wrappers:
+        wrapper, detach = _wrappers[-1]
+        detach()
+        if _wrappers and _wrappers[-1][0] is wrapper:
+            _wrappers.pop()
+
+
+def get_backend():
+    """Retrieve the active backend, wrapped by the outermost wrapper if
+    any.
+    """
+    if _wrappers:
+        return _wrappers[-1][0]
+    if _active_backend is None:
+        return get_default_backend()
+    return _active_backend
+
+
+def get_default_backend():
+    """Retrieve the default backend, importing it if necessary."""
+    global _default_backend
+
+    if _default_backend is None:
+        try:
+            import vrep
+        except ImportError as error:
+            raise ImportError(
+                "Could not import Python binding to V-REP remote API (vrep "
+                "module): {}. Make sure that vrep.py, vrepConst.py and the "
+                "remote API library are available, or use an alternative "
+                "backend.".format(error))
+        _default_backend = vrep
+    return _default_backend
+
+
+def remove_wrapper(wrapper):
+    """Remove the outermost wrapper of the active backend."""
+    if not _wrappers or _wrappers[-1][0] is not wrapper:
+        raise RuntimeError("Could not remove backend wrapper: wrapper is not "
+                           "the outermost one.")
+    _wrappers.pop()
+
+
+def set_backend(backend=None):
+    """Set the active backend, or restore the default one."""
+    global _active_backend
+
+    if _wrappers and backend is not _active_backend:
+        raise RuntimeError("Could not set backend: active backend wrapped.")
+    _active_backend = backend
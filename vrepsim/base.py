@@ -11,8 +11,8 @@ from vrepsim.simulator import get_default_simulator
 class Communicator(object):
     """Generic communicator with V-REP simulator."""
 
-    def __init__(self, vrep_sim):
-        if vrep_sim is not None:
+    def __init__(self, vrep_sim, lazy=False):
+        if vrep_sim is not None or lazy:
             self._vrep_sim = vrep_sim
         else:
             self._vrep_sim = get_default_simulator(raise_on_none=True)
@@ -20,9 +20,11 @@ class Communicator(object):
     @property
     def client_id(self):
         """Client ID."""
-        return self._vrep_sim.client_id
+        return self.vrep_sim.client_id
 
     @property
     def vrep_sim(self):
         """Interface to V-REP remote API server."""
+        if self._vrep_sim is None:
+            self._vrep_sim = get_default_simulator(raise_on_none=True)
         return self._vrep_sim
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of V-REP remote API server.
+
+Benchmark of V-REP remote API server provides the following functionality:
+
+- measuring time of connecting to a V-REP remote API server;
+- measuring ping time;
+- measuring rates of reading data in blocking mode and from data streamed from
+  V-REP;
+- measuring throughput of retrieving images from a vision sensor;
+- measuring rate of V-REP simulation steps in synchronous operation mode;
+- checking measurements against required limits;
+- reporting measurements as text or JSON.
+
+The benchmark can be run from the command line:
+
+    python -m vrepsim.bench 127.0.0.1 19997 --sensor Vision_sensor --json
+
+The exit status is 0 if all measurements meet the required limits, 1 if
+connecting or measuring fails, and 2 if any measurement does not meet the
+required limits.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from vrepsim.backend import vrep
+from vrepsim.objects import SceneObject, VisionSensor
+from vrepsim.simulator import Simulator
+
+
+def _format_rate(rate):
+    """Format rate per second."""
+    return "{:.1f}".format(rate) if rate is not None else "-"
+
+
+def _summarize(durations):
+    """Summarize durations (in seconds) in milliseconds, together with the
+    corresponding rate per second.
+    """
+    durations = np.asarray(durations, dtype=float)
+    total = durations.sum()
+    return {'n': len(durations),
+            'mean_ms': float(durations.mean() * 1000.0),
+            'p50_ms': float(np.percentile(durations, 50) * 1000.0),
+            'p90_ms': float(np.percentile(durations, 90) * 1000.0),
+            'max_ms': float(durations.max() * 1000.0),
+            'rate': float(len(durations) / total) if total > 0 else None}
+
+
+def _time_calls(func, n_samples):
+    """Measure durations of calls to function."""
+    durations = np.empty(n_samples)
+    for s in range(n_samples):
+        start = time.perf_counter()
+        func()
+        durations[s] = time.perf_counter() - start
+    return durations
+
+
+def measure_images(vrep_sim, sensor_name, n_samples=100, grayscale=False):
+    """Measure throughput of retrieving images from vision sensor in blocking
+    mode.
+    """
+    sensor = VisionSensor(sensor_name, vrep_sim=vrep_sim)
+    image = sensor.get_image(grayscale, as_array=True)
+    results = _summarize(_time_calls(
+        lambda: sensor.get_image(grayscale, as_array=True), n_samples))
+    results['shape'] = list(image.shape)
+    if results['rate'] is not None:
+        results['mb_per_s'] = results['rate'] * image.nbytes / 1e6
+    return results
+
+
+def measure_ping(vrep_sim, n_samples=100):
+    """Measure round-trip time of ping."""
+    return _summarize(_time_calls(vrep_sim.get_ping_time, n_samples))
+
+
+def measure_reads(vrep_sim, object_name=None, n_samples=100):
+    """Measure rates of reading position of scene object (or, if not
+    specified, V-REP simulation time step) in blocking mode and from data
+    streamed from V-REP.
+    """
+    client_id = vrep_sim.client_id
+    if object_name is not None:
+        handle = SceneObject(object_name, vrep_sim=vrep_sim).handle
+        funcname, args = 'simxGetObjectPosition', (handle, -1)
+    else:
+        funcname = 'simxGetFloatingParameter'
+        args = (vrep.sim_floatparam_simulation_time_step,)
+    func = getattr(vrep, funcname)
+    blocking_args = (client_id,) + args + (vrep.simx_opmode_blocking,)
+    blocking = _summarize(_time_calls(lambda: func(*blocking_args),
+                                      n_samples))
+    vrep_sim.read_stream(funcname, *args)
+    streaming = _summarize(_time_calls(
+        lambda: vrep_sim.read_stream(funcname, *args), n_samples))
+    vrep_sim.stop_stream(funcname, *args)
+    return {'blocking': blocking, 'streaming': streaming}
+
+
+def measure_steps(vrep_sim, n_steps=100):
+    """Measure rate of V-REP simulation steps in synchronous operation mode,
+    each awaited before triggering the next one.
+    """
+    def step():
+        vrep_sim.trig_sim_step()
+        vrep_sim.get_ping_time()
+
+    vrep_sim.start_sim()
+    try:
+        results = _summarize(_time_calls(step, n_steps))
+    finally:
+        vrep_sim.stop_sim()
+    results['sim_dt'] = vrep_sim.get_sim_dt()
+    if results['rate'] is not None:
+        results['realtime_factor'] = results['rate'] * results['sim_dt']
+    return results
+
+
+def run_benchmark(addr, port, sensor_name=None, object_name=None,
+                  n_samples=100, n_steps=100, timeout=5000):
+    """Run benchmark of V-REP remote API server, returning measurements."""
+    vrep_sim = Simulator(addr, port, timeout=timeout)
+    start = time.perf_counter()
+    vrep_sim.connect()
+    results = {'addr': addr, 'port': port,
+               'connect_ms': (time.perf_counter() - start) * 1000.0}
+    try:
+        results['version'] = vrep_sim.get_version()
+        results['ping'] = measure_ping(vrep_sim, n_samples)
+        results['reads'] = measure_reads(vrep_sim, object_name, n_samples)
+        if sensor_name is not None:
+            results['images'] = measure_images(vrep_sim, sensor_name,
+                                               n_samples)
+        if n_steps > 0:
+            results['steps'] = measure_steps(vrep_sim, n_steps)
+    finally:
+        vrep_sim.disconnect()
+    return results
+
+
+def check_limits(results, max_ping=None, min_step_rate=None,
+                 min_image_rate=None):
+    """Check measurements against required limits, returning descriptions
+    of measurements that do not meet them.
+    """
+    failures = []
+    if max_ping is not None and results['ping']['p90_ms'] > max_ping:
+        failures.append("ping time {0:.2f} ms exceeds {1} ms".format(
+            results['ping']['p90_ms'], max_ping))
+    if min_step_rate is not None:
+        rate = results.get('steps', {}).get('rate')
+        if rate is None or rate < min_step_rate:
+            failures.append("step rate {0} is below {1} steps/s".format(
+                _format_rate(rate), min_step_rate))
+    if min_image_rate is not None:
+        rate = results.get('images', {}).get('rate')
+        if rate is None or rate < min_image_rate:
+            failures.append("image rate {0} is below {1} images/s".format(
+                _format_rate(rate), min_image_rate))
+    return failures
+
+
+def format_report(results):
+    """Format measurements as text report."""
+    def timing(name, summary, unit):
+        rate = summary['rate']
+        return ("{0:<18} mean {1:8.3f} ms  p90 {2:8.3f} ms  max {3:8.3f} ms  "
+                "{4} {5}".format(name, summary['mean_ms'], summary['p90_ms'],
+                                 summary['max_ms'], _format_rate(rate), unit))
+
+    lines = ["V-REP remote API server at {0}:{1}".format(results['addr'],
+                                                        results['port'])]
+    if 'version' in results:
+        lines.append("{:<18} {}".format("version", results['version']))
+    lines.append("{:<18} {:.3f} ms".format("connect", results['connect_ms']))
+    if 'ping' in results:
+        lines.append(timing("ping", results['ping'], "pings/s"))
+    if 'reads' in results:
+        lines.append(timing("blocking read", results['reads']['blocking'],
+                            "reads/s"))
+        lines.append(timing("streaming read", results['reads']['streaming'],
+                            "reads/s"))
+    if 'images' in results:
+        images = results['images']
+        lines.append(timing("image", images, "images/s"))
+        if 'mb_per_s' in images:
+            lines.append("{:<18} {:.2f} MB/s ({})".format(
+                "image throughput", images['mb_per_s'],
+                "x".join(str(dim) for dim in images['shape'])))
+    if 'steps' in results:
+        steps = results['steps']
+        lines.append(timing("step", steps, "steps/s"))
+        if 'realtime_factor' in steps:
+            lines.append("{:<18} {:.2f}".format("real-time factor",
+                                               steps['realtime_factor']))
+    for failure in results.get('failures', []):
+        lines.append("FAILED: {}".format(failure))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Run benchmark from the command line, returning exit status."""
+    parser = argparse.ArgumentParser(
+        prog="python -m vrepsim.bench",
+        description="Benchmark V-REP remote API server.")
+    parser.add_argument('addr', help="address of V-REP remote API server")
+    parser.add_argument('port', type=int,
+                        help="port of V-REP remote API server")
+    parser.add_argument('--sensor', help="name of vision sensor to retrieve "
+                        "images from")
+    parser.add_argument('--object', help="name of scene object to read "
+                        "position of")
+    parser.add_argument('--samples', type=int, default=100,
+                        help="number of samples of each measurement")
+    parser.add_argument('--steps', type=int, default=100,
+                        help="number of V-REP simulation steps (0 to skip)")
+    parser.add_argument('--timeout', type=int, default=5000,
+                        help="connection timeout in milliseconds")
+    parser.add_argument('--max-ping', type=float,
+                        help="maximum 90th percentile of ping time in ms")
+    parser.add_argument('--min-step-rate', type=float,
+                        help="minimum rate of V-REP simulation steps per "
+                        "second")
+    parser.add_argument('--min-image-rate', type=float,
+                        help="minimum rate of images per second")
+    parser.add_argument('--json', action='store_true',
+                        help="print measurements as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        results = run_benchmark(args.addr, args.port, args.sensor,
+                                args.object, args.samples, args.steps,
+                                args.timeout)
+    except Exception as e:
+        if args.json:
+            print(json.dumps({'addr': args.addr, 'port': args.port,
+                              'ok': False, 'error': str(e)}))
+        else:
+            print("Benchmark failed: {}".format(e), file=sys.stderr)
+        return 1
+    results['failures'] = check_limits(results, args.max_ping,
+                                       args.min_step_rate,
+                                       args.min_image_rate)
+    results['ok'] = not results['failures']
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_report(results))
+    return 0 if results['ok'] else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""Interface to calculation objects simulated in V-REP.
+
+Interface to calculation objects simulated in V-REP provides individual
+interfaces to the following calculation objects:
+
+- generic calculation object;
+- collision object;
+- distance object.
+
+It also provides interfaces to the following arrays of calculation objects:
+
+- array of generic calculation objects;
+- array of collision objects;
+- array of distance objects.
+
+Results of calculation objects may be read either in blocking mode or from
+data streamed from V-REP. Arrays of calculation objects request results of all
+calculation objects using a single data exchange with V-REP; when streaming,
+results are read from data already received, without any data exchange.
+"""
+
+import numpy as np
+
+from vrepsim.backend import vrep
+from vrepsim.base import Communicator
+from vrepsim.constants import EMPTY_NAME, UNRESOLVED_HANDLE
+from vrepsim.exceptions import ConnectionError, ServerError
+from vrepsim.objects import _unresolved
+
+
+class CalculationObject(Communicator):
+    """Interface to a generic calculation object simulated in V-REP."""
+
+    _get_handle_func = None  # name of V-REP remote API function retrieving
+                             # handle to calculation object
+    _read_func = None  # name of V-REP remote API function reading result of
+                       # calculation object
+
+    def __init__(self, name, vrep_sim=None, lazy=False):
+        super(CalculationObject, self).__init__(vrep_sim, lazy)
+        self._name = name
+        if lazy:
+            self._handle = UNRESOLVED_HANDLE
+            _unresolved.add(self)
+        else:
+            self._handle = self._get_handle()
+
+    @property
+    def handle(self):
+        """Calculation object handle."""
+        if self._handle == UNRESOLVED_HANDLE:
+            self.resolve_handle()
+        return self._handle
+
+    @property
+    def name(self):
+        """Calculation object name."""
+        return self._name
+
+    @property
+    def resolved(self):
+        """Calculation object handle resolved status."""
+        return self._handle != UNRESOLVED_HANDLE
+
+    def read(self, streaming=False):
+        """Read result of calculation object, optionally from data streamed
+        from V-REP, or None if no result is available.
+        """
+        if self._handle == UNRESOLVED_HANDLE:
+            self.resolve_handle()
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not read {}: not connected to V-REP remote API server."
+                "".format(self._name))
+        if streaming:
+            res, result = self.vrep_sim.read_stream(self._read_func,
+                                                    self._handle)
+        else:
+            res, result = getattr(vrep, self._read_func)(
+                client_id, self._handle, vrep.simx_opmode_blocking)
+        if res == vrep.simx_return_ok:
+            return result
+        elif res == vrep.simx_return_novalue_flag:
+            return None
+        else:
+            raise ServerError("Could not read {}.".format(self._name))
+
+    def resolve_handle(self):
+        """Resolve calculation object handle if its resolution has been
+        deferred.
+        """
+        if self._handle == UNRESOLVED_HANDLE:
+            self._handle = self._get_handle()
+            _unresolved.discard(self)
+
+    def _get_handle(self):
+        """Retrieve calculation object handle."""
+        if not self._name:
+            raise RuntimeError("Could not retrieve handle to {}: missing name."
+                               "".format(EMPTY_NAME))
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not retrieve handle to {}: not connected to V-REP "
+                "remote API server.".format(self._name))
+        res, handle = getattr(vrep, self._get_handle_func)(
+            client_id, self._name, vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError(
+                "Could not retrieve handle to {}.".format(self._name))
+        return handle
+
+
+class CollisionObject(CalculationObject):
+    """Interface to collision object simulated in V-REP."""
+
+    _get_handle_func = 'simxGetCollisionHandle'
+    _read_func = 'simxReadCollision'
+
+    def __init__(self, name, vrep_sim=None, lazy=False):
+        super(CollisionObject, self).__init__(name, vrep_sim, lazy)
+
+    def read(self, streaming=False):
+        """Read collision state, optionally from data streamed from V-REP, or
+        None if no result is available.
+        """
+        collision = super(CollisionObject, self).read(streaming)
+        return bool(collision) if collision is not None else None
+
+
+class DistanceObject(CalculationObject):
+    """Interface to distance object simulated in V-REP."""
+
+    _get_handle_func = 'simxGetDistanceHandle'
+    _read_func = 'simxReadDistance'
+
+    def __init__(self, name, vrep_sim=None, lazy=False):
+        super(DistanceObject, self).__init__(name, vrep_sim, lazy)
+
+    def read(self, streaming=False, prec=None):
+        """Read minimum distance, optionally from data streamed from V-REP, or
+        None if no result is available.
+        """
+        distance = super(DistanceObject, self).read(streaming)
+        if distance is None or prec is None:
+            return distance
+        return round(distance, prec)
+
+
+class CalculationObjectArray(object):
+    """Interface to an array of generic calculation objects simulated in
+    V-REP.
+    """
+
+    _dtype = float
+
+    def __init__(self):
+        self._objects = []
+
+    def __contains__(self, item):
+        """Check if specific calculation object belongs to the array."""
+        return item in self._objects
+
+    def __getitem__(self, key):
+        """Retrieve specific calculation object."""
+        return self._objects[key]
+
+    def __iter__(self):
+        """Retrieve iterator over calculation objects."""
+        return iter(self._objects)
+
+    def __len__(self):
+        """Retrieve number of calculation objects."""
+        return len(self._objects)
+
+    def read(self, streaming=False):
+        """Read results of all calculation objects together as a NumPy array,
+        optionally from data streamed from V-REP.
+
+        If not streaming, results are requested from all calculation objects
+        using a single data exchange with V-REP. When streaming, streaming is
+        started for all calculation objects together if necessary, and results
+        are then read from data already received.
+        """
+        if not self._objects:
+            raise RuntimeError("Could not read array of calculation objects: "
+                               "missing interfaces to calculation objects.")
+        read_func = self._objects[0]._read_func
+        results = self._objects[0].vrep_sim.read_batch(
+            [(read_func, (obj.handle,)) for obj in self._objects], streaming)
+        values = np.empty(len(results), dtype=self._dtype)
+        for o, (res, value) in enumerate(results):
+            if res != vrep.simx_return_ok:
+                raise ServerError("Could not read {}."
+                                  "".format(self._objects[o].name))
+            values[o] = value
+        return values
+
+
+class CollisionObjectArray(CalculationObjectArray):
+    """Interface to an array of collision objects simulated in V-REP."""
+
+    _dtype = bool
+
+    def __init__(self, names, vrep_sim=None, lazy=False):
+        super(CollisionObjectArray, self).__init__()
+        if names:
+            self._objects = [CollisionObject(name, vrep_sim, lazy)
+                             for name in names]
+
+
+class DistanceObjectArray(CalculationObjectArray):
+    """Interface to an array of distance objects simulated in V-REP."""
+
+    _dtype = float
+
+    def __init__(self, names, vrep_sim=None, lazy=False):
+        super(DistanceObjectArray, self).__init__()
+        if names:
+            self._objects = [DistanceObject(name, vrep_sim, lazy)
+                             for name in names]
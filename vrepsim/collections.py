@@ -5,24 +5,33 @@ Interface to collections simulated in V-REP provides an interface to a
 collection of scene objects simulated in V-REP.
 """
 
-import vrep
+import numpy as np
 
+from vrepsim.backend import vrep
 from vrepsim.base import Communicator
-from vrepsim.constants import EMPTY_NAME
+from vrepsim.constants import EMPTY_NAME, UNRESOLVED_HANDLE
 from vrepsim.exceptions import ConnectionError, ServerError
+from vrepsim.feeds import ChangeFeed, moved
+from vrepsim.objects import _unresolved
 
 
 class Collection(Communicator):
     """Interface to a collection of scene objects simulated in V-REP."""
 
-    def __init__(self, name, vrep_sim=None):
-        super(Collection, self).__init__(vrep_sim)
+    def __init__(self, name, vrep_sim=None, lazy=False):
+        super(Collection, self).__init__(vrep_sim, lazy)
         self._name = name
-        self._handle = self._get_handle()
+        if lazy:
+            self._handle = UNRESOLVED_HANDLE
+            _unresolved.add(self)
+        else:
+            self._handle = self._get_handle()
 
     @property
     def handle(self):
         """Collection handle."""
+        if self._handle == UNRESOLVED_HANDLE:
+            self.resolve_handle()
         return self._handle
 
     @property
@@ -30,8 +39,23 @@ class Collection(Communicator):
         """Collection name."""
         return self._name
 
+    @property
+    def resolved(self):
+        """Collection handle resolved status."""
+        return self._handle != UNRESOLVED_HANDLE
+
+    def changes(self, epsilon=0.0):
+        """Create change feed of positions of component scene objects, read
+        from data streamed from V-REP, reporting scene objects that moved by
+        more than the specified distance.
+        """
+        return ChangeFeed(lambda: self.read_positions(streaming=True),
+                          moved(epsilon), self.vrep_sim)
+
     def get_names(self):
         """Retrieve names of component scene objects."""
+        if self._handle == UNRESOLVED_HANDLE:
+            self.resolve_handle()
         client_id = self.client_id
         if client_id is None:
             raise ConnectionError(
@@ -49,6 +73,8 @@ class Collection(Communicator):
         angles about x, y, and z axes of the absolute reference frame, each
         angle between -pi and pi.
         """
+        if self._handle == UNRESOLVED_HANDLE:
+            self.resolve_handle()
         client_id = self.client_id
         if client_id is None:
             raise ConnectionError(
@@ -65,6 +91,8 @@ class Collection(Communicator):
 
     def get_positions(self, prec=None):
         """Retrieve positions of component scene objects."""
+        if self._handle == UNRESOLVED_HANDLE:
+            self.resolve_handle()
         client_id = self.client_id
         if client_id is None:
             raise ConnectionError(
@@ -79,6 +107,34 @@ class Collection(Communicator):
             positions = [round(coord, prec) for coord in positions]
         return [positions[p:p+3] for p in range(0, len(positions), 3)]
 
+    def read_positions(self, streaming=False):
+        """Read positions of component scene objects together as a NumPy
+        array of shape (N, 3), optionally from data streamed from V-REP.
+        """
+        if self._handle == UNRESOLVED_HANDLE:
+            self.resolve_handle()
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not retrieve positions of {}: not connected to V-REP "
+                "remote API server.".format(self._name))
+        if streaming:
+            res, _, _, positions, _ = self.vrep_sim.read_stream(
+                'simxGetObjectGroupData', self._handle, 3)
+        else:
+            res, _, _, positions, _ = vrep.simxGetObjectGroupData(
+                client_id, self._handle, 3, vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError(
+                "Could not retrieve positions of {}.".format(self._name))
+        return np.asarray(positions, dtype=float).reshape(-1, 3)
+
+    def resolve_handle(self):
+        """Resolve collection handle if its resolution has been deferred."""
+        if self._handle == UNRESOLVED_HANDLE:
+            self._handle = self._get_handle()
+            _unresolved.discard(self)
+
     def _get_handle(self):
         """Retrieve collection handle."""
         if not self._name:
@@ -89,9 +145,17 @@ class Collection(Communicator):
             raise ConnectionError(
                 "Could not retrieve handle to {}: not connected to V-REP "
                 "remote API server.".format(self._name))
+        handle_cache = self.vrep_sim.handle_cache
+        if handle_cache is not None:
+            handle = handle_cache.get_collection_handle(self._name,
+                                                        self.vrep_sim)
+            if handle is not None:
+                return handle
         res, handle = vrep.simxGetCollectionHandle(client_id, self._name,
                                                    vrep.simx_opmode_blocking)
         if res != vrep.simx_return_ok:
             raise ServerError(
                 "Could not retrieve handle to {}.".format(self._name))
+        if handle_cache is not None:
+            handle_cache.add_collection_handle(self._name, handle)
         return handle
@@ -4,12 +4,19 @@
 Assorted constants provide the following constants:
 
 - constants related to internal representations of substitute handles;
-- constant related to substitute names for instances of interfaces.
+- constant related to substitute names for instances of interfaces;
+- constant related to scripts bundled with V-REPSim.
 """
 
 MISSING_HANDLE = -1  # internal representation of the missing handle
 REMOVED_OBJ_HANDLE = -2  # internal representation of the handle associated
                          # with a removed scene object
+UNRESOLVED_HANDLE = -3  # internal representation of the handle whose
+                        # resolution has been deferred
 EMPTY_NAME = "*Unnamed*"  # substitute name for an instance of an interface to
                           # a collection or a scene object whose name has not
                           # been specified during initialization
+READOUT_SCRIPT_OBJ = "VREPSim_readout"  # name of the scene object to which
+                                       # the bundled script for reduced
+                                       # readout of vision sensors is
+                                       # attached
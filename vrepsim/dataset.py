@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""Datasets of images captured by vision sensors simulated in V-REP.
+
+Datasets of images captured by vision sensors simulated in V-REP provide the
+following functionality:
+
+- capturing images and depth buffers from a vision sensor together with
+  V-REP simulation time and sensor pose, on demand or after each V-REP
+  simulation step;
+- writing captured frames into preallocated memory-mapped .npy files;
+- resuming interrupted captures;
+- opening written datasets as memory-mapped NumPy arrays.
+
+A dataset is a directory holding a manifest and memory-mapped .npy files of
+shape (N, H, W, C) for images, (N, H, W) for depth buffers and (N,) for
+per-frame metadata (V-REP simulation time, position and orientation of the
+sensor). Each frame is decoded straight into its slot in the memory-mapped
+files, and all data of a frame are requested using a single data exchange
+with V-REP. The number of written frames is stored in the manifest only after
+the data are flushed to disk, so that an interrupted capture can be resumed
+from the last frame known to be complete.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from vrepsim.backend import vrep
+from vrepsim.exceptions import ConnectionError, ServerError
+from vrepsim.objects import to_handle
+
+MANIFEST_FILENAME = 'manifest.json'
+IMAGE_FILENAME = 'image.npy'
+DEPTH_FILENAME = 'depth.npy'
+META_FILENAME = 'meta.npy'
+META_DTYPE = np.dtype([('time', np.float64), ('position', np.float64, (3,)),
+                       ('orientation', np.float64, (3,))])
+
+
+def open_dataset(path, mode='r'):
+    """Open dataset as a dictionary of memory-mapped NumPy arrays holding the
+    written frames.
+    """
+    with open(os.path.join(path, MANIFEST_FILENAME), 'r') as manifest_file:
+        manifest = json.load(manifest_file)
+    n_written = manifest['n_written']
+    dataset = {'meta': np.load(os.path.join(path, META_FILENAME),
+                               mmap_mode=mode)[:n_written]}
+    if manifest['image']:
+        dataset['image'] = np.load(os.path.join(path, IMAGE_FILENAME),
+                                   mmap_mode=mode)[:n_written]
+    if manifest['depth']:
+        dataset['depth'] = np.load(os.path.join(path, DEPTH_FILENAME),
+                                   mmap_mode=mode)[:n_written]
+    return dataset
+
+
+class DatasetWriter(object):
+    """Writer of dataset of images captured by a vision sensor simulated in
+    V-REP.
+
+    The resolution of the sensor is retrieved when the dataset is created. If
+    the dataset already exists, it is resumed if required (provided that it
+    was created with the same settings); otherwise, creating the writer fails.
+    """
+
+    def __init__(self, path, sensor, n_frames, image=True, depth=True,
+                 grayscale=False, relative=None, resume=False,
+                 flush_every=100):
+        if n_frames < 1:
+            raise ValueError("Number of frames must be positive.")
+        if not image and not depth:
+            raise ValueError("Could not create dataset: neither images nor "
+                             "depth buffers selected.")
+        self._path = path
+        self._sensor = sensor
+        self._relative = relative
+        self._flush_every = int(flush_every)
+        self._attached = False
+        width, height = sensor.get_resolution()
+        manifest = {'sensor': sensor.name, 'n_frames': int(n_frames),
+                    'width': int(width), 'height': int(height),
+                    'image': bool(image), 'depth': bool(depth),
+                    'grayscale': bool(grayscale), 'n_written': 0}
+
+        # Resume existing dataset or create a new one
+        manifest_filename = os.path.join(path, MANIFEST_FILENAME)
+        if os.path.exists(manifest_filename):
+            if not resume:
+                raise RuntimeError("Could not create dataset in {}: dataset "
+                                   "already exists.".format(path))
+            with open(manifest_filename, 'r') as manifest_file:
+                stored = json.load(manifest_file)
+            n_written = stored.pop('n_written')
+            manifest.pop('n_written')
+            if stored != manifest:
+                raise RuntimeError("Could not resume dataset in {}: settings "
+                                   "differ.".format(path))
+            manifest['n_written'] = n_written
+            file_mode = 'r+'
+        else:
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            file_mode = 'w+'
+        self._manifest = manifest
+        self._n_written = manifest['n_written']
+        n_channels = 1 if grayscale else 3
+        self._image = (np.lib.format.open_memmap(
+            os.path.join(path, IMAGE_FILENAME), file_mode, np.uint8,
+            (n_frames, height, width, n_channels)) if image else None)
+        self._depth = (np.lib.format.open_memmap(
+            os.path.join(path, DEPTH_FILENAME), file_mode, np.float32,
+            (n_frames, height, width)) if depth else None)
+        self._meta = np.lib.format.open_memmap(
+            os.path.join(path, META_FILENAME), file_mode, META_DTYPE,
+            (n_frames,))
+        if file_mode == 'w+':
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def attached(self):
+        """Writer attached status."""
+        return self._attached
+
+    @property
+    def full(self):
+        """Dataset full status."""
+        return self._n_written >= self._manifest['n_frames']
+
+    @property
+    def n_frames(self):
+        """Number of frames of the dataset."""
+        return self._manifest['n_frames']
+
+    @property
+    def n_written(self):
+        """Number of frames written so far."""
+        return self._n_written
+
+    @property
+    def path(self):
+        """Path to the dataset."""
+        return self._path
+
+    def attach(self):
+        """Start capturing a frame after each V-REP simulation step."""
+        if self._attached:
+            raise RuntimeError("Could not attach writer: writer already "
+                               "attached.")
+        self._sensor.vrep_sim.add_step_hook(self._capture_step, after=True)
+        self._attached = True
+
+    def capture(self, streaming=False):
+        """Capture frame from the vision sensor, optionally from data streamed
+        from V-REP, and write it into the next slot of the dataset, returning
+        the index of the slot.
+        """
+        if self.full:
+            raise RuntimeError("Could not capture frame: dataset full.")
+        handle = to_handle(self._sensor, "sensor")
+        relative_handle = to_handle(self._relative, "relative")
+        vrep_sim = self._sensor.vrep_sim
+        client_id = vrep_sim.client_id
+        if client_id is None:
+            raise ConnectionError("Could not capture frame: not connected to "
+                                  "V-REP remote API server.")
+        calls = [('simxGetObjectPosition', (handle, relative_handle)),
+                 ('simxGetObjectOrientation', (handle, relative_handle))]
+        if self._image is not None:
+            calls.append(('simxGetVisionSensorImage',
+                          (handle, self._manifest['grayscale'])))
+        if self._depth is not None:
+            calls.append(('simxGetVisionSensorDepthBuffer', (handle,)))
+        results = vrep_sim.read_batch(calls, streaming)
+        if any(result[0] != vrep.simx_return_ok for result in results):
+            raise ServerError("Could not capture frame from {}."
+                              "".format(self._sensor.name))
+        sim_time = vrep.simxGetLastCmdTime(client_id) / 1000.0
+
+        # Decode data straight into the slot, reversing pixel rows from
+        # bottom up to top down order
+        index = self._n_written
+        width, height = self._manifest['width'], self._manifest['height']
+        results = iter(results)
+        meta = self._meta[index]
+        meta['time'] = sim_time
+        meta['position'] = next(results)[1]
+        meta['orientation'] = next(results)[1]
+        if self._image is not None:
+            _, resolution, data = next(results)
+            self._check_resolution(resolution)
+            self._image[index, ::-1] = np.asarray(
+                data, dtype=np.int8).view(np.uint8).reshape(
+                    height, width, -1)
+        if self._depth is not None:
+            _, resolution, data = next(results)
+            self._check_resolution(resolution)
+            self._depth[index, ::-1] = np.asarray(
+                data, dtype=np.float32).reshape(height, width)
+        self._n_written += 1
+        if (self.full or self._flush_every > 0
+                and self._n_written % self._flush_every == 0):
+            self.flush()
+        return index
+
+    def close(self):
+        """Flush written frames and stop capturing frames."""
+        if self._attached:
+            self.detach()
+        if self._meta is not None:
+            self.flush()
+            self._image = self._depth = self._meta = None
+
+    def detach(self):
+        """Stop capturing a frame after each V-REP simulation step."""
+        if not self._attached:
+            raise RuntimeError("Could not detach writer: writer not "
+                               "attached.")
+        self._sensor.vrep_sim.remove_step_hook(self._capture_step)
+        self._attached = False
+
+    def flush(self):
+        """Flush written frames to disk and store their number."""
+        for data in (self._image, self._depth, self._meta):
+            if data is not None:
+                data.flush()
+        self._manifest['n_written'] = self._n_written
+        manifest_filename = os.path.join(self._path, MANIFEST_FILENAME)
+        tmp_filename = "{}.tmp".format(manifest_filename)
+        with open(tmp_filename, 'w') as manifest_file:
+            json.dump(self._manifest, manifest_file)
+        os.replace(tmp_filename, manifest_filename)
+
+    def _capture_step(self):
+        """Capture frame after V-REP simulation step unless dataset is
+        full.
+        """
+        if not self.full:
+            self.capture(streaming=True)
+
+    def _check_resolution(self, resolution):
+        """Check that resolution matches the dataset."""
+        if list(resolution) != [self._manifest['width'],
+                                self._manifest['height']]:
+            raise RuntimeError("Could not capture frame from {}: resolution "
+                               "changed.".format(self._sensor.name))
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""Dispatcher of V-REP remote API calls issued from multiple threads.
+
+Dispatcher of V-REP remote API calls issued from multiple threads provides the
+following functionality:
+
+- executing V-REP remote API calls issued from any thread in a single
+  dispatching thread;
+- sending non-blocking V-REP remote API calls issued close in time together;
+- requesting data by blocking V-REP remote API calls issued close in time
+  using a single data exchange with V-REP.
+
+While the dispatcher is running, it wraps the active backend providing V-REP
+remote API, so that all interfaces communicating with V-REP simulator can be
+safely used from multiple threads. A V-REP remote API call issued from a
+thread other than the dispatching thread is queued and the calling thread
+waits for its result. The dispatching thread collects calls issued within a
+short time window and executes them in order, sending each run of consecutive
+non-blocking calls in a single message with communication paused. Blocking
+calls retrieving data (by functions supporting buffer operation mode) within
+such a run are sent in non-blocking mode in the same message, followed by a
+single blocking call retrieving ping time, after which their data are read
+from the replies already received. Other blocking calls are executed on their
+own. While
+communication is paused by one thread, blocking calls from other threads are
+postponed until communication is resumed.
+"""
+
+import concurrent.futures
+import queue
+import threading
+import time
+
+from vrepsim.backend import add_wrapper, get_backend, remove_wrapper
+
+# V-REP remote API functions whose last argument is not an operation mode
+NO_OPMODE_FUNCS = frozenset([
+    'simxStart', 'simxFinish', 'simxGetPingTime', 'simxGetLastCmdTime',
+    'simxSynchronous', 'simxSynchronousTrigger', 'simxPauseCommunication',
+    'simxGetInMessageInfo', 'simxGetOutMessageInfo', 'simxGetConnectionId',
+    'simxCreateBuffer', 'simxReleaseBuffer'
+    ])
+
+# V-REP remote API functions retrieving data which support buffer operation
+# mode, so that their blocking calls may be sent together
+BUFFERED_FUNCS = frozenset([
+    'simxGetObjectHandle', 'simxGetCollectionHandle', 'simxGetObjectPosition',
+    'simxGetObjectOrientation', 'simxGetObjectVelocity',
+    'simxGetObjectParent', 'simxGetObjectChild', 'simxGetJointPosition',
+    'simxGetJointMatrix', 'simxGetJointForce', 'simxGetObjectFloatParameter',
+    'simxGetObjectIntParameter', 'simxGetObjectGroupData',
+    'simxGetBooleanParameter', 'simxGetFloatingParameter',
+    'simxGetIntegerParameter', 'simxGetStringParameter',
+    'simxGetArrayParameter', 'simxGetFloatSignal', 'simxGetIntegerSignal',
+    'simxGetStringSignal', 'simxReadProximitySensor', 'simxReadForceSensor',
+    'simxReadVisionSensor', 'simxGetVisionSensorImage',
+    'simxGetVisionSensorDepthBuffer'
+    ])
+
+
+class DispatchingAPI(object):
+    """V-REP remote API executing calls in the dispatching thread."""
+
+    def __init__(self, dispatcher, api):
+        self._dispatcher = dispatcher
+        self._api = api
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not name.startswith('simx') or not callable(attr):
+            return attr
+        dispatcher = self._dispatcher
+
+        def call(*args):
+            if dispatcher.in_dispatching_thread():
+                return attr(*args)
+            return dispatcher.submit(name, *args).result()
+
+        return call
+
+
+class Dispatcher(object):
+    """Dispatcher of V-REP remote API calls issued from multiple threads."""
+
+    def __init__(self, vrep_sim, window=0.001, max_batch=256):
+        self._vrep_sim = vrep_sim
+        self._window = window
+        self._max_batch = int(max_batch)
+        self._api = None
+        self._wrapper = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._paused_by = None
+        self._postponed = []
+
+    @property
+    def running(self):
+        """Dispatcher running status."""
+        return self._thread is not None
+
+    @property
+    def window(self):
+        """Time window within which calls are collected together."""
+        return self._window
+
+    def in_dispatching_thread(self):
+        """Check if the current thread is the dispatching thread."""
+        return threading.current_thread() is self._thread
+
+    def start(self):
+        """Start dispatching V-REP remote API calls."""
+        if self._thread is not None:
+            raise RuntimeError("Could not start dispatcher: dispatcher "
+                               "already running.")
+        if not self._vrep_sim.connected:
+            raise RuntimeError("Could not start dispatcher: not connected to "
+                               "V-REP remote API server.")
+        self._api = get_backend()
+        self._thread = threading.Thread(target=self._dispatch)
+        self._thread.daemon = True
+        self._thread.start()
+        self._wrapper = DispatchingAPI(self, self._api)
+        add_wrapper(self._wrapper, self._detach)
+
+    def stop(self):
+        """Stop dispatching V-REP remote API calls, executing calls that have
+        already been issued.
+        """
+        if self._thread is None:
+            raise RuntimeError("Could not stop dispatcher: dispatcher not "
+                               "running.")
+        remove_wrapper(self._wrapper)
+        self._wrapper = None
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, name, *args):
+        """Issue V-REP remote API call and return its future result."""
+        if self._thread is None:
+            raise RuntimeError("Could not issue call to {}: dispatcher not "
+                               "running.".format(name))
+        future = concurrent.futures.Future()
+        self._queue.put((name, args, future, threading.current_thread()))
+        return future
+
+    def _detach(self):
+        """Stop dispatcher when wrappers of the active backend are
+        detached.
+        """
+        if self._vrep_sim.dispatcher is self:
+            self._vrep_sim.stop_dispatcher()
+        else:
+            self.stop()
+
+    def _dispatch(self):
+        """Collect issued calls and execute them until stopped."""
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.time() + self._window
+            while batch[-1] is not None and len(batch) < self._max_batch:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                running = False
+            self._execute(batch)
+        self._execute(self._postponed)
+        self._postponed = []
+
+    def _execute(self, batch):
+        """Execute calls, sending runs of consecutive non-blocking calls and
+        blocking calls retrieving data together.
+        """
+        run = []
+        for call in batch:
+            name, args, _, thread = call
+            if name == 'simxPauseCommunication':
+                self._execute_run(run)
+                run = []
+                self._execute_call(call)
+                self._paused_by = thread if args[1] else None
+                if self._paused_by is None and self._postponed:
+                    postponed = self._postponed
+                    self._postponed = []
+                    self._execute(postponed)
+            elif self._is_non_blocking(name, args):
+                run.append(call)
+            elif self._paused_by is not None and self._paused_by is not thread:
+                self._postponed.append(call)
+            elif self._paused_by is None and self._is_buffered(name, args):
+                run.append(call)
+            else:
+                self._execute_run(run)
+                run = []
+                self._execute_call(call)
+        self._execute_run(run)
+
+    def _execute_buffered(self, call):
+        """Set result of blocking call retrieving data from the reply already
+        received, executing the call if no reply has been received.
+        """
+        name, args, future, _ = call
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            func = getattr(self._api, name)
+            result = func(*(args[:-1] + (self._api.simx_opmode_buffer,)))
+            res = result[0] if isinstance(result, tuple) else result
+            if res == self._api.simx_return_novalue_flag:
+                result = func(*args)
+            future.set_result(result)
+        except Exception as error:
+            future.set_exception(error)
+
+    def _execute_call(self, call):
+        """Execute call and set its result."""
+        name, args, future, _ = call
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(getattr(self._api, name)(*args))
+        except Exception as error:
+            future.set_exception(error)
+
+    def _execute_non_blocking(self, calls):
+        """Execute non-blocking calls, sending them in a single message unless
+        communication is already paused.
+        """
+        if len(calls) > 1 and self._paused_by is None:
+            client_id = self._vrep_sim.client_id
+            self._api.simxPauseCommunication(client_id, True)
+            try:
+                for call in calls:
+                    self._execute_call(call)
+            finally:
+                self._api.simxPauseCommunication(client_id, False)
+        else:
+            for call in calls:
+                self._execute_call(call)
+
+    def _execute_run(self, calls):
+        """Execute run of non-blocking calls and blocking calls retrieving
+        data, sending them in a single message and then reading data
+        retrieved by blocking calls from the replies.
+        """
+        buffered = [call for call in calls
+                    if not self._is_non_blocking(call[0], call[1])]
+        if not buffered or len(calls) == 1:
+            self._execute_non_blocking(calls)
+            return
+        api = self._api
+        client_id = self._vrep_sim.client_id
+        api.simxPauseCommunication(client_id, True)
+        try:
+            for call in calls:
+                name, args, _, _ = call
+                if self._is_non_blocking(name, args):
+                    self._execute_call(call)
+                else:
+                    try:
+                        getattr(api, name)(
+                            *(args[:-1] + (api.simx_opmode_oneshot,)))
+                    except Exception:
+                        pass  # the call is executed again when reading data
+        finally:
+            api.simxPauseCommunication(client_id, False)
+        api.simxGetPingTime(client_id)
+        for call in buffered:
+            self._execute_buffered(call)
+
+    def _is_buffered(self, name, args):
+        """Check if blocking call retrieves data by function supporting buffer
+        operation mode.
+        """
+        return (name in BUFFERED_FUNCS and bool(args)
+                and args[-1] == self._api.simx_opmode_blocking)
+
+    def _is_non_blocking(self, name, args):
+        """Check if call does not wait for reply from V-REP."""
+        if name in NO_OPMODE_FUNCS or not args:
+            return False
+        return args[-1] != self._api.simx_opmode_blocking
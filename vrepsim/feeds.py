@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""Change feeds of data read from V-REP.
+
+Change feeds of data read from V-REP provide the following functionality:
+
+- reading data (e.g., distances measured by proximity sensors or positions of
+  scene objects) on each V-REP simulation step or on demand;
+- comparing data with the last reported snapshot, vectorized over all
+  elements;
+- calling registered callbacks only with elements that have changed.
+
+The snapshot is only updated for elements reported as changed, so that slow
+drifts are reported once they accumulate beyond the tolerance rather than
+being lost between consecutive readings.
+"""
+
+import numpy as np
+
+from vrepsim.base import Communicator
+
+
+def crossed(threshold):
+    """Create a change detector reporting elements whose values crossed the
+    specified threshold, with NaN values treated as being above it.
+    """
+    def detect(values, snapshot):
+        with np.errstate(invalid='ignore'):
+            return (values < threshold) != (snapshot < threshold)
+    return detect
+
+
+def moved(epsilon=0.0):
+    """Create a change detector reporting elements whose values (scalars or
+    vectors along the last axis) changed by more than the specified tolerance,
+    or changed between NaN and a number.
+    """
+    def detect(values, snapshot):
+        diff = values - snapshot
+        if diff.ndim > 1:
+            diff = np.sqrt(np.sum(diff * diff, axis=-1))
+            nan = np.isnan(values).any(axis=-1) != np.isnan(snapshot).any(
+                axis=-1)
+        else:
+            diff = np.abs(diff)
+            nan = np.isnan(values) != np.isnan(snapshot)
+        with np.errstate(invalid='ignore'):
+            return (diff > epsilon) | nan
+    return detect
+
+
+class ChangeFeed(Communicator):
+    """Change feed of data read from V-REP.
+
+    Data are read by a function returning a NumPy array whose first axis runs
+    over elements, and changes are detected by a function taking the array
+    read and the last reported snapshot and returning a boolean mask over
+    elements. On the first poll, all elements are reported as changed, with
+    previous values filled with NaN. Callbacks are called with indices of
+    changed elements together with their current and previous values.
+    """
+
+    def __init__(self, read_func, detect_func, vrep_sim=None):
+        super(ChangeFeed, self).__init__(vrep_sim)
+        self._read_func = read_func
+        self._detect_func = detect_func
+        self._snapshot = None
+        self._callbacks = []
+        self._attached = False
+
+    @property
+    def attached(self):
+        """Change feed attached status."""
+        return self._attached
+
+    @property
+    def snapshot(self):
+        """Last reported values of all elements, or None if not polled yet."""
+        return None if self._snapshot is None else self._snapshot.copy()
+
+    def add_callback(self, callback):
+        """Add function called with indices of changed elements together with
+        their current and previous values.
+        """
+        self._callbacks.append(callback)
+
+    def attach(self):
+        """Start polling after each V-REP simulation step."""
+        if self._attached:
+            raise RuntimeError("Could not attach change feed: change feed "
+                               "already attached.")
+        self.vrep_sim.add_step_hook(self.poll, after=True)
+        self._attached = True
+
+    def detach(self):
+        """Stop polling after each V-REP simulation step."""
+        if not self._attached:
+            raise RuntimeError("Could not detach change feed: change feed not "
+                               "attached.")
+        self.vrep_sim.remove_step_hook(self.poll)
+        self._attached = False
+
+    def poll(self):
+        """Read data and report changes since the last reported snapshot,
+        returning indices of changed elements together with their current and
+        previous values.
+        """
+        values = np.asarray(self._read_func(), dtype=float)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.shape != values.shape:
+            snapshot = np.full_like(values, np.nan)
+            indices = np.arange(len(values))
+        else:
+            indices = np.flatnonzero(self._detect_func(values, snapshot))
+        current = values[indices]
+        previous = snapshot[indices]
+        snapshot[indices] = current
+        self._snapshot = snapshot
+        if len(indices):
+            for callback in self._callbacks:
+                callback(indices, current, previous)
+        return indices, current, previous
+
+    def remove_callback(self, callback):
+        """Remove function called with changed elements."""
+        self._callbacks.remove(callback)
+
+    def reset(self):
+        """Discard the last reported snapshot."""
+        self._snapshot = None
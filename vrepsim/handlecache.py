@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""Cache of handles to scene objects and collections simulated in V-REP.
+
+Cache of handles to scene objects and collections simulated in V-REP provides
+the following functionality:
+
+- storing handles to scene objects and collections in a file, separately for
+  each scene file;
+- validating stored handles against V-REP remote API server;
+- refreshing stored handles to all scene objects in bulk.
+
+Handles are stored separately for each scene, identified by the path to the
+scene file together with its modification time and size (or, optionally, a
+hash of its contents), so that processes connecting to the same scene do not
+have to retrieve handles again. When first used after
+connecting, the cache retrieves the scene path and checks a few stored handles
+using a single data exchange with V-REP; if any of them is stale (or no handles
+are stored for the scene), handles to all scene objects are retrieved using a
+single data exchange with V-REP.
+
+The scene path is reported by V-REP remote API server, whereas the scene file
+is examined by the client. If the scene file is not accessible locally (e.g.,
+when V-REP remote API server runs on another host, or when the scene has not
+been saved), the scene cannot be identified, so handles are neither read from
+nor written to the file, and handles to all scene objects are retrieved in
+bulk each time the cache is validated. Otherwise, stored handles are still
+checked, in case a different file exists locally under the same path.
+"""
+
+import hashlib
+import json
+import os
+import random
+
+from vrepsim.backend import vrep
+from vrepsim.exceptions import ServerError
+
+
+def _default_filename():
+    """Retrieve default name of the file storing handles."""
+    return os.path.join(os.path.expanduser('~'), '.cache', 'vrepsim',
+                        'handles.json')
+
+
+class HandleCache(object):
+    """Cache of handles to scene objects and collections simulated in V-REP."""
+
+    def __init__(self, filename=None, n_checks=3, use_hash=False):
+        self._filename = filename if filename is not None else \
+            _default_filename()
+        self._n_checks = int(n_checks)
+        self._use_hash = use_hash
+        self._key = None
+        self._objects = {}
+        self._collections = {}
+        self._validated = False
+        self._dirty = False
+
+    @property
+    def filename(self):
+        """Name of the file storing handles."""
+        return self._filename
+
+    @property
+    def validated(self):
+        """Cache validated status for the current connection."""
+        return self._validated
+
+    def add_collection_handle(self, name, handle):
+        """Store handle to collection."""
+        if self._collections.get(name) != handle:
+            self._collections[name] = handle
+            self._dirty = True
+
+    def add_object_handle(self, name, handle):
+        """Store handle to scene object."""
+        if self._objects.get(name) != handle:
+            self._objects[name] = handle
+            self._dirty = True
+
+    def get_collection_handle(self, name, vrep_sim):
+        """Retrieve stored handle to collection, or None if not stored."""
+        if not self._validated:
+            self.validate(vrep_sim)
+        return self._collections.get(name)
+
+    def get_object_handle(self, name, vrep_sim):
+        """Retrieve stored handle to scene object, or None if not stored."""
+        if not self._validated:
+            self.validate(vrep_sim)
+        return self._objects.get(name)
+
+    def invalidate(self):
+        """Require stored handles to be validated before they are used next
+        time, e.g., after reconnecting to V-REP remote API server.
+        """
+        self._validated = False
+
+    def refresh(self, vrep_sim):
+        """Retrieve handles to all scene objects in bulk, discarding stored
+        handles to collections.
+        """
+        res, handles, _, _, names = vrep.simxGetObjectGroupData(
+            vrep_sim.client_id, vrep.sim_appobj_object_type, 0,
+            vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError("Could not refresh handles to scene objects.")
+        self.update_object_handles(names, handles, replace=True)
+        self._collections.clear()
+        self._dirty = True
+        self.save()
+
+    def save(self):
+        """Write stored handles to file if they have changed."""
+        if not self._dirty or self._key is None:
+            return
+        scenes = self._load()
+        scenes[self._key] = {'objects': self._objects,
+                             'collections': self._collections}
+        directory = os.path.dirname(self._filename)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        tmp_filename = "{}.{}.tmp".format(self._filename, os.getpid())
+        with open(tmp_filename, 'w') as cache_file:
+            json.dump(scenes, cache_file)
+        os.replace(tmp_filename, self._filename)
+        self._dirty = False
+
+    def update_object_handles(self, names, handles, replace=False):
+        """Store handles to scene objects retrieved in bulk, optionally
+        replacing all stored handles to scene objects.
+        """
+        objects = dict(zip(names, handles))
+        if replace:
+            self._dirty = self._dirty or objects != self._objects
+            self._objects = objects
+        else:
+            for name, handle in objects.items():
+                self.add_object_handle(name, handle)
+
+    def validate(self, vrep_sim):
+        """Select stored handles for the scene simulated in V-REP and check a
+        few of them, refreshing them in bulk if any of them is stale (or if
+        the scene file is not accessible locally).
+        """
+        # If the scene cannot be identified, retrieve handles to all scene
+        # objects at once without storing them
+        key = self._get_scene_key(vrep_sim.get_scene_path())
+        if key is None:
+            self.save()
+            self._key = None
+            self._validated = True
+            self.refresh(vrep_sim)
+            return
+
+        # Select handles stored for the scene
+        if key != self._key:
+            self.save()
+            table = self._load().get(key, {})
+            self._key = key
+            self._objects = dict(table.get('objects', {}))
+            self._collections = dict(table.get('collections', {}))
+            self._dirty = False
+        self._validated = True
+
+        # If no handles are stored for the scene, retrieve handles to all
+        # scene objects at once; otherwise, check a few randomly selected
+        # handles to scene objects using a single data exchange with V-REP
+        if not self._objects:
+            self.refresh(vrep_sim)
+            return
+        names = random.sample(sorted(self._objects),
+                              min(self._n_checks, len(self._objects)))
+        results = vrep_sim.read_batch(
+            [('simxGetObjectHandle', (name,)) for name in names])
+        if all(res == vrep.simx_return_ok and handle == self._objects[name]
+               for name, (res, handle) in zip(names, results)):
+            return
+        self.refresh(vrep_sim)
+
+    def _get_scene_key(self, scene_path):
+        """Retrieve key identifying scene, or None if the scene file is not
+        accessible locally.
+        """
+        if not scene_path or not os.path.isfile(scene_path):
+            return None
+        if self._use_hash:
+            digest = hashlib.sha1()
+            with open(scene_path, 'rb') as scene_file:
+                for block in iter(lambda: scene_file.read(1 << 20), b''):
+                    digest.update(block)
+            return "{0}|{1}".format(scene_path, digest.hexdigest())
+        stat = os.stat(scene_path)
+        return "{0}|{1}|{2}".format(scene_path, stat.st_mtime_ns,
+                                    stat.st_size)
+
+    def _load(self):
+        """Read handles stored for all scenes from file."""
+        try:
+            with open(self._filename, 'r') as cache_file:
+                return json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return {}
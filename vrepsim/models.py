@@ -8,9 +8,9 @@ following models:
 - Pioneer P3-DX robot.
 """
 
-import vrep
-
-from vrepsim.constants import MISSING_HANDLE, REMOVED_OBJ_HANDLE
+from vrepsim.backend import vrep
+from vrepsim.constants import (MISSING_HANDLE, REMOVED_OBJ_HANDLE,
+                               UNRESOLVED_HANDLE)
 from vrepsim.exceptions import ConnectionError, ServerError
 from vrepsim.objects import MotorArray, ProximitySensorArray, SceneObject
 
@@ -18,8 +18,8 @@ from vrepsim.objects import MotorArray, ProximitySensorArray, SceneObject
 class Model(SceneObject):
     """Interface to a generic model simulated in V-REP."""
 
-    def __init__(self, name, parent=None, vrep_sim=None):
-        super(Model, self).__init__(name, parent, vrep_sim)
+    def __init__(self, name, parent=None, vrep_sim=None, lazy=False):
+        super(Model, self).__init__(name, parent, vrep_sim, lazy)
 
     def get_bbox_limits(self, prec=None):
         """Retrieve limits of model bounding box."""
@@ -33,6 +33,8 @@ class Model(SceneObject):
             )
 
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve limits of {} bounding box: missing "
@@ -78,6 +80,8 @@ class Model(SceneObject):
     def remove(self):
         """Remove model from scene."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not remove {}: missing name or "
                                    "handle.".format(self._name))
@@ -100,7 +104,8 @@ class PioneerBot(Model):
     """Interface to Pioneer P3-DX robot simulated in V-REP."""
 
     def __init__(self, name, us_sensor_names, motor_names, parent=None,
-                 vrep_sim=None):
-        super(PioneerBot, self).__init__(name, parent, vrep_sim)
-        self.us_sensors = ProximitySensorArray(us_sensor_names, self, vrep_sim)
-        self.wheels = MotorArray(motor_names, self, vrep_sim)
+                 vrep_sim=None, lazy=False):
+        super(PioneerBot, self).__init__(name, parent, vrep_sim, lazy)
+        self.us_sensors = ProximitySensorArray(us_sensor_names, self, vrep_sim,
+                                               lazy)
+        self.wheels = MotorArray(motor_names, self, vrep_sim, lazy)
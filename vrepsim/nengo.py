@@ -5,25 +5,65 @@ Nengo communicator for data exchange with V-REP simulator provides the
 following functionality:
 
 - adding slots for input data to V-REP;
-- adding slots for output data from V-REP;
+- adding slots for output data from V-REP, optionally computed from data
+  read by declared V-REP remote API calls;
 - updating states of scene objects simulated in V-REP.
+
+It also provides a coordinator of data exchange with V-REP simulator by
+multiple Nengo communicators, which provides the following functionality:
+
+- registering and unregistering Nengo communicators;
+- updating states of scene objects simulated in V-REP for all registered
+  Nengo communicators at once, triggering a single V-REP simulation step.
+
+Output data computed from data read by declared V-REP remote API calls are
+retrieved for a Nengo communicator (or, when coordinated, for all registered
+Nengo communicators) using a single data exchange with V-REP.
 """
 
+from vrepsim.backend import add_wrapper, get_backend, remove_wrapper
 from vrepsim.base import Communicator
+from vrepsim.exceptions import SimulationError
+
+
+class _NonBlockingAPI(object):
+    """V-REP remote API rejecting blocking calls."""
+
+    def __init__(self, api):
+        self._api = api
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not name.startswith('simx') or not callable(attr):
+            return attr
+        opmode_blocking = self._api.simx_opmode_blocking
+
+        def call(*args):
+            if args and args[-1] == opmode_blocking:
+                raise SimulationError(
+                    "Could not send input data: blocking call to {} issued "
+                    "while sending input data together.".format(name))
+            return attr(*args)
+
+        return call
 
 
 class NengoComm(Communicator):
     """Nengo communicator for data exchange with V-REP simulator."""
 
-    def __init__(self, n_nengo_sim_steps, vrep_sim=None):
+    def __init__(self, n_nengo_sim_steps, vrep_sim=None, coordinator=None):
         super(NengoComm, self).__init__(vrep_sim)
         self._input_handlers = []
         self._output_handlers = []
         self._size_in = 0
         self._size_out = 0
+        self._input = []
         self._output = []
         self._n_nengo_sim_steps = int(n_nengo_sim_steps)
         self._nengo_sim_steps_count = 1
+        self._coordinator = None
+        if coordinator is not None:
+            coordinator.register(self)
 
     def __call__(self, t, x):
         """Update states of scene objects simulated in V-REP."""
@@ -34,27 +74,40 @@ class NengoComm(Communicator):
             # time step
             self._nengo_sim_steps_count = self._n_nengo_sim_steps
 
+            # If coordinated, let the coordinator exchange data with V-REP
+            # and trigger next V-REP simulation step
+            if self._coordinator is not None:
+                self._coordinator.update(self, x)
+                return self._output
+
             # Send input data to simulated scene objects
-            start_dim = 0
-            for func, dim in self._input_handlers:
-                func(x[start_dim:start_dim+dim])
-                start_dim += dim
+            self.send_input(x)
 
             # Retrieve output data from simulated scene objects
-            output = []
-            for func in self._output_handlers:
-                res = func()
-                try:
-                    output.extend(res)
-                except TypeError:
-                    output.append(res)
-            self._output = output
+            self.retrieve_output()
 
             # Trigger next V-REP simulation step
             self.vrep_sim.trig_sim_step()
 
         return self._output
 
+    @property
+    def coordinator(self):
+        """Coordinator of data exchange with V-REP simulator, or None if not
+        coordinated.
+        """
+        return self._coordinator
+
+    @property
+    def input(self):
+        """Last input data to V-REP."""
+        return self._input
+
+    @property
+    def output(self):
+        """Last output data from V-REP."""
+        return self._output
+
     @property
     def size_in(self):
         """Number of dimensions of input data to V-REP."""
@@ -70,8 +123,175 @@ class NengoComm(Communicator):
         self._input_handlers.append((function, dimensions))
         self._size_in += dimensions
 
+    @property
+    def output_calls(self):
+        """V-REP remote API calls declared for reading output data, each
+        described by the name of V-REP remote API function and the arguments
+        (following client ID) it is called with.
+        """
+        return [call for _, calls in self._output_handlers if calls
+                for call in calls]
+
     def add_output(self, function, dimensions):
         """Add slots for output data from V-REP."""
-        self._output_handlers.append(function)
+        self._output_handlers.append((function, None))
+        self._size_out += dimensions
+        self._output.extend([0.0]*dimensions)
+
+    def add_output_reads(self, calls, function, dimensions):
+        """Add slots for output data from V-REP computed by the specified
+        function from the results of V-REP remote API functions, each
+        specified by its name and the arguments (following client ID) it is
+        called with, which are read together with other declared calls.
+        """
+        calls = [(funcname, tuple(args)) for funcname, args in calls]
+        if not calls:
+            raise ValueError("Could not add output reads: missing calls.")
+        self._output_handlers.append((function, calls))
         self._size_out += dimensions
         self._output.extend([0.0]*dimensions)
+
+    def retrieve_output(self, results=None):
+        """Retrieve output data from simulated scene objects, reading data by
+        all declared V-REP remote API calls using a single data exchange with
+        V-REP, unless their results are specified.
+        """
+        if results is None:
+            calls = self.output_calls
+            results = self.vrep_sim.read_batch(calls) if calls else []
+        results = iter(results)
+        output = []
+        for func, calls in self._output_handlers:
+            if calls is None:
+                res = func()
+            else:
+                res = func([next(results) for _ in calls])
+            try:
+                output.extend(res)
+            except TypeError:
+                output.append(res)
+        self._output = output
+
+    def send_input(self, x):
+        """Send input data to simulated scene objects."""
+        self._input = x
+        start_dim = 0
+        for func, dim in self._input_handlers:
+            func(x[start_dim:start_dim+dim])
+            start_dim += dim
+
+
+class StepCoordinator(Communicator):
+    """Coordinator of data exchange with V-REP simulator by multiple Nengo
+    communicators.
+
+    Once all registered Nengo communicators have received their input data,
+    input data of all of them are sent to V-REP, output data of all of them
+    are retrieved, and a single V-REP simulation step is triggered. Nengo
+    communicators updated before the last one return output data retrieved on
+    the previous V-REP simulation step.
+
+    By default, input data of all Nengo communicators are sent together with
+    communication paused, so input functions must only issue non-blocking
+    V-REP remote API calls (e.g., setting motor velocities with blocking
+    disabled); a blocking call raises SimulationError. Output data declared
+    as V-REP remote API calls of all Nengo communicators are then read using a
+    single data exchange with V-REP (which also awaits the input data), so
+    that a coordinated step costs a single data exchange besides triggering
+    the step; other output functions are called one by one.
+    """
+
+    def __init__(self, batch_inputs=True, vrep_sim=None):
+        super(StepCoordinator, self).__init__(vrep_sim)
+        self._batch_inputs = batch_inputs
+        self._comms = []
+        self._inputs = {}
+
+    def __contains__(self, item):
+        """Check if specific Nengo communicator is registered."""
+        return item in self._comms
+
+    def __len__(self):
+        """Retrieve number of registered Nengo communicators."""
+        return len(self._comms)
+
+    @property
+    def batch_inputs(self):
+        """Sending input data of all Nengo communicators together."""
+        return self._batch_inputs
+
+    def register(self, comm):
+        """Register Nengo communicator."""
+        if not isinstance(comm, NengoComm):
+            raise TypeError("Could not register Nengo communicator: type not "
+                            "supported.")
+        if comm.coordinator is not None:
+            raise ValueError("Could not register Nengo communicator: "
+                             "communicator already coordinated.")
+        self._comms.append(comm)
+        comm._coordinator = self
+
+    def unregister(self, comm):
+        """Unregister Nengo communicator."""
+        try:
+            self._comms.remove(comm)
+        except ValueError:
+            raise ValueError("Could not unregister Nengo communicator: "
+                             "communicator not registered.")
+        comm._coordinator = None
+        self._inputs.pop(comm, None)
+        if self._inputs and len(self._inputs) == len(self._comms):
+            self._exchange()
+
+    def update(self, comm, x):
+        """Update states of scene objects simulated in V-REP for Nengo
+        communicator, exchanging data for all Nengo communicators once all of
+        them have been updated.
+        """
+        if comm not in self._comms:
+            raise ValueError("Could not update states for Nengo "
+                             "communicator: communicator not registered.")
+        if comm in self._inputs:
+            raise SimulationError(
+                "Could not update states for Nengo communicator: communicator "
+                "updated twice before other communicators were updated.")
+        self._inputs[comm] = x
+        if len(self._inputs) == len(self._comms):
+            self._exchange()
+
+    def _exchange(self):
+        """Exchange data with V-REP for all Nengo communicators and trigger
+        next V-REP simulation step.
+        """
+        inputs = self._inputs
+        self._inputs = {}
+
+        # Send input data of all communicators, rejecting blocking calls if
+        # sent together
+        if self._batch_inputs:
+            wrapper = _NonBlockingAPI(get_backend())
+            add_wrapper(wrapper, lambda: remove_wrapper(wrapper))
+            try:
+                with self.vrep_sim.pause_comm():
+                    for comm in self._comms:
+                        if comm in inputs:
+                            comm.send_input(inputs[comm])
+            finally:
+                remove_wrapper(wrapper)
+        else:
+            for comm in self._comms:
+                if comm in inputs:
+                    comm.send_input(inputs[comm])
+
+        # Retrieve output data of all communicators, reading declared data of
+        # all of them using a single data exchange with V-REP
+        comm_calls = [comm.output_calls for comm in self._comms]
+        calls = [call for calls in comm_calls for call in calls]
+        results = self.vrep_sim.read_batch(calls) if calls else []
+        start = 0
+        for comm, calls in zip(self._comms, comm_calls):
+            comm.retrieve_output(results[start:start+len(calls)])
+            start += len(calls)
+
+        # Trigger next V-REP simulation step
+        self.vrep_sim.trig_sim_step()
@@ -6,6 +6,7 @@ the following scene objects:
 
 - generic scene object;
 - dummy object;
+- force sensor;
 - motor (motorized joint);
 - proximity sensor;
 - vision sensor.
@@ -14,20 +15,95 @@ It also provides interfaces to the following arrays of scene objects:
 
 - array of motors;
 - array of generic sensors;
-- array of proximity sensors.
+- array of force sensors;
+- array of proximity sensors;
+- array of vision sensors.
 
 It also provides the following functionality:
 
-- retrieving handle to scene object from various types.
+- retrieving handle to scene object from various types;
+- resolving deferred handles to scene objects in bulk.
 """
 
 import math
+import weakref
 
-import vrep
+import numpy as np
 
+from vrepsim.backend import vrep
 from vrepsim.base import Communicator
-from vrepsim.constants import EMPTY_NAME, MISSING_HANDLE, REMOVED_OBJ_HANDLE
+from vrepsim.constants import (EMPTY_NAME, MISSING_HANDLE, READOUT_SCRIPT_OBJ,
+                               REMOVED_OBJ_HANDLE, UNRESOLVED_HANDLE)
 from vrepsim.exceptions import ConnectionError, ServerError, SimulationError
+from vrepsim.feeds import ChangeFeed, crossed, moved
+from vrepsim.simulator import get_default_simulator
+
+_unresolved = weakref.WeakSet()  # interfaces whose handle resolution has been
+                                 # deferred
+
+
+def _joint_state_calls(handle):
+    """Retrieve V-REP remote API calls reading position, velocity and applied
+    force (or torque) of joint.
+    """
+    return [('simxGetJointPosition', (handle,)),
+            ('simxGetObjectFloatParameter',
+             (handle, vrep.sim_jointfloatparam_velocity)),
+            ('simxGetJointForce', (handle,))]
+
+
+def resolve_handles(objs=None, vrep_sim=None):
+    """Resolve deferred handles to scene objects (or collections) in bulk.
+
+    Handles to all scene objects are retrieved using a single data exchange
+    with V-REP (unless all of them are cached); handles to collections, for
+    which no such data exchange exists, are retrieved one by one. If no
+    interfaces are specified, deferred handles of all interfaces are resolved.
+    """
+    if objs is None:
+        objs = list(_unresolved)
+    objs = [obj for obj in objs if not obj.resolved]
+    if not objs:
+        return
+    if vrep_sim is None:
+        vrep_sim = get_default_simulator(raise_on_none=True)
+
+    # If possible, retrieve cached handles to scene objects
+    scene_objs = [obj for obj in objs if isinstance(obj, SceneObject)]
+    handle_cache = vrep_sim.handle_cache
+    if scene_objs and handle_cache is not None:
+        for obj in scene_objs:
+            handle = handle_cache.get_object_handle(obj._name, vrep_sim)
+            if handle is not None:
+                obj._handle = handle
+                _unresolved.discard(obj)
+        scene_objs = [obj for obj in scene_objs if not obj.resolved]
+
+    # Retrieve handles to all scene objects at once
+    if scene_objs:
+        client_id = vrep_sim.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not resolve handles to scene objects: not connected to "
+                "V-REP remote API server.")
+        res, handles, _, _, names = vrep.simxGetObjectGroupData(
+            client_id, vrep.sim_appobj_object_type, 0,
+            vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError("Could not resolve handles to scene objects.")
+        if handle_cache is not None:
+            handle_cache.update_object_handles(names, handles)
+        handles = dict(zip(names, handles))
+        for obj in scene_objs:
+            handle = handles.get(obj._name)
+            if handle is not None:
+                obj._handle = handle
+                _unresolved.discard(obj)
+
+    # Resolve remaining handles one by one
+    for obj in objs:
+        if not obj.resolved:
+            obj.resolve_handle()
 
 
 def to_handle(obj, name):
@@ -56,11 +132,15 @@ def to_handle(obj, name):
 class SceneObject(Communicator):
     """Interface to a generic scene object simulated in V-REP."""
 
-    def __init__(self, name, parent=None, vrep_sim=None):
-        super(SceneObject, self).__init__(vrep_sim)
+    def __init__(self, name, parent=None, vrep_sim=None, lazy=False):
+        super(SceneObject, self).__init__(vrep_sim, lazy)
         if name:
             self._name = name
-            self._handle = self._get_handle()
+            if lazy:
+                self._handle = UNRESOLVED_HANDLE
+                _unresolved.add(self)
+            else:
+                self._handle = self._get_handle()
         else:
             self._name = EMPTY_NAME
             self._handle = MISSING_HANDLE
@@ -77,6 +157,8 @@ class SceneObject(Communicator):
     @property
     def handle(self):
         """Object handle."""
+        if self._handle == UNRESOLVED_HANDLE:
+            self.resolve_handle()
         if self._handle >= 0:
             return self._handle
         elif self._handle == MISSING_HANDLE:
@@ -96,6 +178,11 @@ class SceneObject(Communicator):
                                "".format(self._name))
         return self._name if self._name != EMPTY_NAME else None
 
+    @property
+    def resolved(self):
+        """Object handle resolved status."""
+        return self._handle != UNRESOLVED_HANDLE
+
     @property
     def removed(self):
         """Object removed status."""
@@ -147,6 +234,8 @@ class SceneObject(Communicator):
     def copy_paste(self):
         """Copy and paste object."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not copy and paste {}: missing name "
                                    "or handle.".format(self._name))
@@ -177,6 +266,8 @@ class SceneObject(Communicator):
             )
 
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve limits of {} bounding box: missing "
@@ -210,6 +301,8 @@ class SceneObject(Communicator):
         and z axes of the reference frame, each angle between -pi and pi.
         """
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve orientation of {}: missing name or "
@@ -239,6 +332,8 @@ class SceneObject(Communicator):
         axes of the reference frame, each angle between -pi and pi.
         """
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not set orientation of {}: missing "
                                    "name or handle.".format(self._name))
@@ -265,6 +360,8 @@ class SceneObject(Communicator):
     def get_parent_handle(self):
         """Retrieve handle to object parent."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve handle to the parent of {}: missing "
@@ -287,6 +384,8 @@ class SceneObject(Communicator):
     def set_parent(self, parent, keep_pos=True):
         """Set object parent."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not set parent of {}: missing name "
                                    "or handle.".format(self._name))
@@ -313,6 +412,8 @@ class SceneObject(Communicator):
     def get_position(self, relative=None, prec=None):
         """Retrieve object position."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve position of {}: missing name or "
@@ -340,6 +441,8 @@ class SceneObject(Communicator):
     def set_position(self, position, relative=None, allow_in_sim=False):
         """Set object position."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not set position of {}: missing "
                                    "name or handle.".format(self._name))
@@ -421,6 +524,8 @@ class SceneObject(Communicator):
     def remove(self):
         """Remove object from scene."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not remove {}: missing name or "
                                    "handle.".format(self._name))
@@ -438,6 +543,12 @@ class SceneObject(Communicator):
             raise ServerError("Could not remove {}.".format(self._name))
         self.set_removed()
 
+    def resolve_handle(self):
+        """Resolve object handle if its resolution has been deferred."""
+        if self._handle == UNRESOLVED_HANDLE:
+            self._handle = self._get_handle()
+            _unresolved.discard(self)
+
     def _get_handle(self):
         """Retrieve object handle."""
         if self._name == EMPTY_NAME:
@@ -448,30 +559,109 @@ class SceneObject(Communicator):
             raise ConnectionError(
                 "Could not retrieve handle to {}: not connected to V-REP "
                 "remote API server.".format(self._name))
+        handle_cache = self.vrep_sim.handle_cache
+        if handle_cache is not None:
+            handle = handle_cache.get_object_handle(self._name, self.vrep_sim)
+            if handle is not None:
+                return handle
         res, handle = vrep.simxGetObjectHandle(client_id, self._name,
                                                vrep.simx_opmode_blocking)
         if res != vrep.simx_return_ok:
             raise ServerError(
                 "Could not retrieve handle to {}.".format(self._name))
+        if handle_cache is not None:
+            handle_cache.add_object_handle(self._name, handle)
         return handle
 
 
 class Dummy(SceneObject):
     """Interface to dummy object simulated in V-REP."""
 
-    def __init__(self, name, parent=None, vrep_sim=None):
-        super(Dummy, self).__init__(name, parent, vrep_sim)
+    def __init__(self, name, parent=None, vrep_sim=None, lazy=False):
+        super(Dummy, self).__init__(name, parent, vrep_sim, lazy)
+
+
+class ForceSensor(SceneObject):
+    """Interface to force sensor simulated in V-REP."""
+
+    def __init__(self, name, parent=None, vrep_sim=None, lazy=False):
+        super(ForceSensor, self).__init__(name, parent, vrep_sim, lazy)
+
+    def read(self, streaming=False):
+        """Read force and torque vectors measured by the sensor as a NumPy
+        array of shape (6,), optionally from data streamed from V-REP, or None
+        if no data are available.
+        """
+        if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
+            if self._handle == MISSING_HANDLE:
+                raise RuntimeError("Could not read {}: missing name or handle."
+                                   "".format(self._name))
+            if self._handle == REMOVED_OBJ_HANDLE:
+                raise RuntimeError("Could not read {}: object removed."
+                                   "".format(self._name))
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not read {}: not connected to V-REP remote API server."
+                "".format(self._name))
+        if streaming:
+            res, state, force, torque = self.vrep_sim.read_stream(
+                'simxReadForceSensor', self._handle)
+        else:
+            res, state, force, torque = vrep.simxReadForceSensor(
+                client_id, self._handle, vrep.simx_opmode_blocking)
+        if res == vrep.simx_return_ok:
+            if not state & 1:  # sensor has no data yet
+                return None
+            return np.array(list(force) + list(torque))
+        elif res == vrep.simx_return_novalue_flag:
+            return None
+        else:
+            raise ServerError("Could not read {}.".format(self._name))
 
 
 class Motor(SceneObject):
     """Interface to motor (motorized joint) simulated in V-REP."""
 
-    def __init__(self, name, parent=None, vrep_sim=None):
-        super(Motor, self).__init__(name, parent, vrep_sim)
+    def __init__(self, name, parent=None, vrep_sim=None, lazy=False):
+        super(Motor, self).__init__(name, parent, vrep_sim, lazy)
+
+    def get_state(self, streaming=False, prec=None):
+        """Retrieve motor position, velocity and applied force (or torque)
+        together, optionally from data streamed from V-REP.
+        """
+        if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
+            if self._handle == MISSING_HANDLE:
+                raise RuntimeError("Could not retrieve {} state: missing name "
+                                   "or handle.".format(self._name))
+            if self._handle == REMOVED_OBJ_HANDLE:
+                raise RuntimeError("Could not retrieve {} state: object "
+                                   "removed.".format(self._name))
+        if self.client_id is None:
+            raise ConnectionError(
+                "Could not retrieve {} state: not connected to V-REP remote "
+                "API server.".format(self._name))
+        results = self.vrep_sim.read_batch(_joint_state_calls(self._handle),
+                                           streaming)
+        if any(result[0] != vrep.simx_return_ok for result in results):
+            raise ServerError(
+                "Could not retrieve {} state.".format(self._name))
+        state = tuple(result[1] for result in results)
+        if prec is not None:
+            state = tuple(round(value, prec) for value in state)
+        return state
 
-    def set_velocity(self, velocity):
-        """Set motor velocity."""
+    def set_velocity(self, velocity, blocking=True):
+        """Set motor velocity, optionally without waiting for V-REP to
+        confirm it.
+        """
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not set {} velocity: missing name "
                                    "or handle.".format(self._name))
@@ -483,21 +673,31 @@ class Motor(SceneObject):
             raise ConnectionError(
                 "Could not set {} velocity: not connected to V-REP remote API "
                 "server.".format(self._name))
-        res = vrep.simxSetJointTargetVelocity(
-            client_id, self._handle, velocity, vrep.simx_opmode_blocking)
-        if res != vrep.simx_return_ok:
-            raise ServerError("Could not set {} velocity.".format(self._name))
+        if blocking:
+            res = vrep.simxSetJointTargetVelocity(
+                client_id, self._handle, velocity, vrep.simx_opmode_blocking)
+            if res != vrep.simx_return_ok:
+                raise ServerError(
+                    "Could not set {} velocity.".format(self._name))
+        else:
+            res = vrep.simxSetJointTargetVelocity(
+                client_id, self._handle, velocity, vrep.simx_opmode_oneshot)
+            if res not in (vrep.simx_return_ok, vrep.simx_return_novalue_flag):
+                raise ServerError(
+                    "Could not set {} velocity.".format(self._name))
 
 
 class ProximitySensor(SceneObject):
     """Interface to proximity sensor simulated in V-REP."""
 
-    def __init__(self, name, parent=None, vrep_sim=None):
-        super(ProximitySensor, self).__init__(name, parent, vrep_sim)
+    def __init__(self, name, parent=None, vrep_sim=None, lazy=False):
+        super(ProximitySensor, self).__init__(name, parent, vrep_sim, lazy)
 
     def get_distance(self, fast=True, prec=None):
         """Retrieve distance to the detected point."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not retrieve data from {}: missing "
                                    "name or handle.".format(self._name))
@@ -530,13 +730,15 @@ class ProximitySensor(SceneObject):
 class VisionSensor(SceneObject):
     """Interface to vision sensor simulated in V-REP."""
 
-    def __init__(self, name, parent=None, vrep_sim=None):
-        super(VisionSensor, self).__init__(name, parent, vrep_sim)
+    def __init__(self, name, parent=None, vrep_sim=None, lazy=False):
+        super(VisionSensor, self).__init__(name, parent, vrep_sim, lazy)
 
-    def get_depth_buffer(self, prec=None):
-        """Retrieve depth buffer."""
+    def get_depth_buffer(self, prec=None, as_array=False):
+        """Retrieve depth buffer, optionally as a NumPy array."""
         # Retrieve depth buffer from the vision sensor simulated in V-REP
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve depth buffer from {}: missing name or "
@@ -554,19 +756,29 @@ class VisionSensor(SceneObject):
         if res != vrep.simx_return_ok:
             raise ServerError(
                 "Could not retrieve depth buffer from {}.".format(self._name))
+        width, height = resolution
+
+        # If necessary, return depth buffer as array with pixels arranged in
+        # rows, reversing from bottom up to top down order
+        if as_array:
+            buffer = np.array(buffer, dtype=np.float32)
+            if prec is not None:
+                buffer = np.round(buffer, prec)
+            return buffer.reshape(height, width)[::-1]
 
         # If necessary, round depth values
         if prec is not None:
             buffer = [round(val, prec) for val in buffer]
 
         # Arrange pixels in rows, reversing from bottom up to top down order
-        width, height = resolution
         return [buffer[p:p+width]
                 for p in reversed(range(0, width * height, width))]
 
     def get_far_clip_plane(self, prec=None):
         """Retrieve far clipping plane."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve far clipping plane of {}: missing "
@@ -597,6 +809,8 @@ class VisionSensor(SceneObject):
     def set_far_clip_plane(self, clip_plane):
         """Set far clipping plane."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not set far clipping plane of {}: missing name or "
@@ -616,10 +830,14 @@ class VisionSensor(SceneObject):
             raise ServerError("Could not set far clipping plane of {}."
                               "".format(self._name))
 
-    def get_image(self, grayscale=False):
-        """Retrieve image."""
+    def get_image(self, grayscale=False, as_array=False):
+        """Retrieve image, optionally as a NumPy array of unsigned 8-bit
+        integers.
+        """
         # Retrieve image from the vision sensor simulated in V-REP
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not retrieve image from {}: missing "
                                    "name or handle.".format(self._name))
@@ -636,13 +854,22 @@ class VisionSensor(SceneObject):
         if res != vrep.simx_return_ok:
             raise ServerError(
                 "Could not retrieve image from {}.".format(self._name))
+        width, height = resolution
+
+        # If necessary, return image as array with pixels arranged in rows,
+        # reversing from bottom up to top down order; pixel values are
+        # reinterpreted as unsigned without conversion
+        if as_array:
+            image = np.array(image, dtype=np.int8).view(np.uint8)
+            if grayscale:
+                return image.reshape(height, width)[::-1]
+            return image.reshape(height, width, 3)[::-1]
 
         # Convert misrepresented pixel values due to the underlying unsigned
         # type
         image = [val if val >= 0 else val + 256 for val in image]
 
         # If necessary, arrange RGB triplets
-        width, height = resolution
         n_pixels = width * height
         if not grayscale:
             image = [image[p:p+3] for p in range(0, 3*n_pixels, 3)]
@@ -653,6 +880,8 @@ class VisionSensor(SceneObject):
     def get_near_clip_plane(self, prec=None):
         """Retrieve near clipping plane."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve near clipping plane of {}: missing "
@@ -680,9 +909,42 @@ class VisionSensor(SceneObject):
                                                   # V-REP
         return clip_plane
 
+    def get_reduced_depth_buffer(self, roi=None, step=1, bits=None,
+                                 script_obj=READOUT_SCRIPT_OBJ):
+        """Retrieve depth buffer as a NumPy array, cropped to region of
+        interest (x, y, width, height), decimated and optionally quantized to
+        8- or 16-bit unsigned integers inside V-REP by the bundled script
+        (readout.lua) attached to the specified scene object.
+        """
+        if bits not in (None, 8, 16):
+            raise ValueError("Number of bits is not supported.")
+        width, height, buffer = self._read_reduced(
+            'vrepsim_readDepthBuffer', roi, step, bits or 0, script_obj,
+            "depth buffer")
+        dtype = {None: '<f4', 8: np.uint8, 16: '<u2'}[bits]
+        return np.frombuffer(buffer, dtype=dtype).reshape(height,
+                                                          width)[::-1]
+
+    def get_reduced_image(self, roi=None, step=1, grayscale=False,
+                          script_obj=READOUT_SCRIPT_OBJ):
+        """Retrieve image as a NumPy array of unsigned 8-bit integers, cropped
+        to region of interest (x, y, width, height) and decimated inside V-REP
+        by the bundled script (readout.lua) attached to the specified scene
+        object.
+        """
+        width, height, image = self._read_reduced(
+            'vrepsim_readImage', roi, step, int(grayscale), script_obj,
+            "image")
+        image = np.frombuffer(image, dtype=np.uint8)
+        if grayscale:
+            return image.reshape(height, width)[::-1]
+        return image.reshape(height, width, 3)[::-1]
+
     def set_near_clip_plane(self, clip_plane):
         """Set near clipping plane."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not set near clipping plane of {}: missing name or "
@@ -705,6 +967,8 @@ class VisionSensor(SceneObject):
     def get_resolution(self):
         """Retrieve resolution."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError(
                     "Could not retrieve resolution of {}: missing name or "
@@ -734,6 +998,8 @@ class VisionSensor(SceneObject):
     def set_resolution(self, resolution):
         """Set resolution."""
         if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
             if self._handle == MISSING_HANDLE:
                 raise RuntimeError("Could not set resolution of {}: missing "
                                    "name or handle.".format(self._name))
@@ -758,13 +1024,83 @@ class VisionSensor(SceneObject):
             raise ServerError("Could not set resolution of {}."
                               "".format(self._name))
 
+    def read(self, streaming=False):
+        """Read detection state and auxiliary packets of values computed by
+        the filters of the sensor (as NumPy arrays), optionally from data
+        streamed from V-REP, or None if no data are available.
+
+        The first auxiliary packet holds the minimum, maximum and average of
+        intensity, red, green, blue and depth values of the image; subsequent
+        packets hold values returned by the filters, e.g., blob detection.
+        """
+        if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
+            if self._handle == MISSING_HANDLE:
+                raise RuntimeError("Could not read {}: missing name or handle."
+                                   "".format(self._name))
+            if self._handle == REMOVED_OBJ_HANDLE:
+                raise RuntimeError("Could not read {}: object removed."
+                                   "".format(self._name))
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not read {}: not connected to V-REP remote API server."
+                "".format(self._name))
+        if streaming:
+            res, detect, packets = self.vrep_sim.read_stream(
+                'simxReadVisionSensor', self._handle)
+        else:
+            res, detect, packets = vrep.simxReadVisionSensor(
+                client_id, self._handle, vrep.simx_opmode_blocking)
+        if res == vrep.simx_return_ok:
+            return detect, [np.array(packet) for packet in packets]
+        elif res == vrep.simx_return_novalue_flag:
+            return None
+        else:
+            raise ServerError("Could not read {}.".format(self._name))
+
+    def _read_reduced(self, funcname, roi, step, option, script_obj, data):
+        """Retrieve data reduced inside V-REP by the bundled script, together
+        with their width and height.
+        """
+        if self._handle < 0:
+            if self._handle == UNRESOLVED_HANDLE:
+                self.resolve_handle()
+            if self._handle == MISSING_HANDLE:
+                raise RuntimeError(
+                    "Could not retrieve reduced {0} from {1}: missing name or "
+                    "handle.".format(data, self._name))
+            if self._handle == REMOVED_OBJ_HANDLE:
+                raise RuntimeError("Could not retrieve reduced {0} from {1}: "
+                                   "object removed.".format(data, self._name))
+        if roi is None:
+            roi = (0, 0, 0, 0)
+        if int(step) < 1:
+            raise ValueError("Decimation step must be positive.")
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not retrieve reduced {0} from {1}: not connected to "
+                "V-REP remote API server.".format(data, self._name))
+        res, rets_int, _, _, buffer = vrep.simxCallScriptFunction(
+            client_id, script_obj, vrep.sim_scripttype_customizationscript,
+            funcname, [self._handle] + [int(v) for v in roi] + [int(step),
+                                                                option],
+            [], [], bytearray(), vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError("Could not retrieve reduced {0} from {1}."
+                              "".format(data, self._name))
+        width, height = rets_int[:2]
+        return width, height, buffer
+
 
 class MotorArray(object):
     """Interface to an array of motors simulated in V-REP."""
 
-    def __init__(self, motor_names, parent=None, vrep_sim=None):
+    def __init__(self, motor_names, parent=None, vrep_sim=None, lazy=False):
         if motor_names:
-            self._motors = [Motor(name, parent, vrep_sim)
+            self._motors = [Motor(name, parent, vrep_sim, lazy)
                             for name in motor_names]
         else:
             self._motors = []
@@ -785,13 +1121,46 @@ class MotorArray(object):
         """Retrieve number of motors."""
         return len(self._motors)
 
-    def set_velocities(self, motor_velocities):
-        """Set velocities for all motors."""
+    def get_states(self, streaming=False):
+        """Retrieve positions, velocities and applied forces (or torques) of
+        all motors together as three NumPy arrays, optionally from data
+        streamed from V-REP.
+
+        If not streaming, data are requested from all motors using a single
+        data exchange with V-REP.
+        """
+        if not self._motors:
+            raise RuntimeError("Could not retrieve states of array of motors: "
+                               "missing interfaces to motors.")
+        calls = []
+        for motor in self._motors:
+            if motor.handle is None:
+                raise RuntimeError("Could not retrieve {} state: missing name "
+                                   "or handle.".format(motor._name))
+            calls.extend(_joint_state_calls(motor._handle))
+        results = self._motors[0].vrep_sim.read_batch(calls, streaming)
+        states = np.empty((len(self._motors), 3))
+        for r, result in enumerate(results):
+            if result[0] != vrep.simx_return_ok:
+                raise ServerError("Could not retrieve {} state."
+                                  "".format(self._motors[r // 3]._name))
+            states[r // 3, r % 3] = result[1]
+        return states[:, 0], states[:, 1], states[:, 2]
+
+    def set_velocities(self, motor_velocities, blocking=True):
+        """Set velocities for all motors, optionally sending them together
+        without waiting for V-REP to confirm them.
+        """
         if not self._motors:
             raise RuntimeError("Could not set velocities for array of motors: "
                                "missing interfaces to motors.")
-        for m, motor in enumerate(self._motors):
-            motor.set_velocity(motor_velocities[m])
+        if blocking:
+            for m, motor in enumerate(self._motors):
+                motor.set_velocity(motor_velocities[m])
+        else:
+            with self._motors[0].vrep_sim.pause_comm():
+                for m, motor in enumerate(self._motors):
+                    motor.set_velocity(motor_velocities[m], blocking=False)
 
 
 class SensorArray(object):
@@ -817,13 +1186,51 @@ class SensorArray(object):
         return len(self._sensors)
 
 
+class ForceSensorArray(SensorArray):
+    """Interface to an array of force sensors simulated in V-REP."""
+
+    def __init__(self, sensor_names, parent=None, vrep_sim=None, lazy=False):
+        super(ForceSensorArray, self).__init__()
+        if sensor_names:
+            self._sensors = [ForceSensor(name, parent, vrep_sim, lazy)
+                             for name in sensor_names]
+
+    def read(self, streaming=False):
+        """Read force and torque vectors measured by all sensors together as a
+        NumPy array of shape (N, 6), optionally from data streamed from V-REP,
+        with rows of sensors that have no data yet filled with NaN.
+
+        If not streaming, data are requested from all sensors using a single
+        data exchange with V-REP.
+        """
+        if not self._sensors:
+            raise RuntimeError("Could not retrieve data from array of "
+                               "sensors: missing interfaces to sensors.")
+        calls = []
+        for sensor in self._sensors:
+            if sensor.handle is None:
+                raise RuntimeError("Could not read {}: missing name or handle."
+                                   "".format(sensor._name))
+            calls.append(('simxReadForceSensor', (sensor._handle,)))
+        results = self._sensors[0].vrep_sim.read_batch(calls, streaming)
+        data = np.full((len(self._sensors), 6), np.nan)
+        for s, (res, state, force, torque) in enumerate(results):
+            if res != vrep.simx_return_ok:
+                raise ServerError(
+                    "Could not read {}.".format(self._sensors[s]._name))
+            if state & 1:
+                data[s, :3] = force
+                data[s, 3:] = torque
+        return data
+
+
 class ProximitySensorArray(SensorArray):
     """Interface to an array of proximity sensors simulated in V-REP."""
 
-    def __init__(self, sensor_names, parent=None, vrep_sim=None):
+    def __init__(self, sensor_names, parent=None, vrep_sim=None, lazy=False):
         super(ProximitySensorArray, self).__init__()
         if sensor_names:
-            self._sensors = [ProximitySensor(name, parent, vrep_sim)
+            self._sensors = [ProximitySensor(name, parent, vrep_sim, lazy)
                              for name in sensor_names]
 
     def get_distances(self, fast=True, prec=None):
@@ -833,3 +1240,148 @@ class ProximitySensorArray(SensorArray):
                                "sensors: missing interfaces to sensors.")
         return [sensor.get_distance(fast=fast, prec=prec)
                 for sensor in self._sensors]
+
+    def changes(self, threshold=None, epsilon=0.0, fast=True):
+        """Create change feed of distances to the detected points, read from
+        data streamed from V-REP, reporting sensors whose distances crossed
+        the specified threshold or, if no threshold is specified, changed by
+        more than the specified tolerance.
+        """
+        if threshold is not None:
+            detect_func = crossed(threshold)
+        else:
+            detect_func = moved(epsilon)
+        return ChangeFeed(
+            lambda: self.read_distances(streaming=True, fast=fast),
+            detect_func, self._sensors[0].vrep_sim if self._sensors else None)
+
+    def read_distances(self, streaming=False, fast=True):
+        """Read distances to the detected points by all sensors together as a
+        NumPy array, optionally from data streamed from V-REP, with distances
+        of sensors that detect nothing set to NaN.
+
+        Data of all proximity sensors in the scene are requested using a
+        single data exchange with V-REP.
+        """
+        if not self._sensors:
+            raise RuntimeError("Could not retrieve data from array of "
+                               "sensors: missing interfaces to sensors.")
+        handles = []
+        for sensor in self._sensors:
+            if sensor.handle is None:
+                raise RuntimeError("Could not retrieve data from {}: missing "
+                                   "name or handle.".format(sensor._name))
+            handles.append(sensor._handle)
+        vrep_sim = self._sensors[0].vrep_sim
+        client_id = vrep_sim.client_id
+        if client_id is None:
+            raise ConnectionError("Could not retrieve data from array of "
+                                  "sensors: not connected to V-REP remote API "
+                                  "server.")
+        if streaming:
+            res, all_handles, ints, floats, _ = vrep_sim.read_stream(
+                'simxGetObjectGroupData', vrep.sim_object_proximitysensor_type,
+                13)
+        else:
+            res, all_handles, ints, floats, _ = vrep.simxGetObjectGroupData(
+                client_id, vrep.sim_object_proximitysensor_type, 13,
+                vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError("Could not retrieve data from array of sensors.")
+
+        # Select data of the sensors in the array
+        positions = {handle: h for h, handle in enumerate(all_handles)}
+        try:
+            indices = np.array([positions[handle] for handle in handles])
+        except KeyError:
+            raise ServerError("Could not retrieve data from array of sensors: "
+                              "sensor not found.")
+        detect = np.asarray(ints, dtype=int).reshape(-1, 2)[indices, 0] & 1
+        points = np.asarray(floats, dtype=float).reshape(-1, 6)[indices, :3]
+        if fast:
+            distances = points[:, 2].copy()
+        else:
+            distances = np.sqrt(np.sum(points * points, axis=1))
+        distances[detect == 0] = np.nan
+        return distances
+
+
+class VisionSensorArray(SensorArray):
+    """Interface to an array of vision sensors simulated in V-REP."""
+
+    def __init__(self, sensor_names, parent=None, vrep_sim=None, lazy=False):
+        super(VisionSensorArray, self).__init__()
+        if sensor_names:
+            self._sensors = [VisionSensor(name, parent, vrep_sim, lazy)
+                             for name in sensor_names]
+
+    def get_images(self, grayscale=False, streaming=False, same_time=False):
+        """Retrieve images from all sensors together as a NumPy array of
+        unsigned 8-bit integers stacked along the first axis, optionally from
+        data streamed from V-REP, together with a NumPy array of V-REP
+        simulation times (in seconds) at which they were captured.
+
+        Images are requested from all sensors using a single data exchange
+        with V-REP. If required, images captured at different V-REP
+        simulation times are refused.
+        """
+        if not self._sensors:
+            raise RuntimeError("Could not retrieve images from array of "
+                               "sensors: missing interfaces to sensors.")
+        handles = []
+        for sensor in self._sensors:
+            if sensor.handle is None:
+                raise RuntimeError("Could not retrieve image from {}: missing "
+                                   "name or handle.".format(sensor._name))
+            handles.append(sensor._handle)
+        vrep_sim = self._sensors[0].vrep_sim
+        client_id = vrep_sim.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not retrieve images from array of sensors: not "
+                "connected to V-REP remote API server.")
+
+        # Request images from all sensors together and wait for them to
+        # arrive
+        if streaming:
+            streams = vrep_sim.streams
+            if any(('simxGetVisionSensorImage', handle, grayscale)
+                   not in streams for handle in handles):
+                with vrep_sim.pause_comm():
+                    for handle in handles:
+                        vrep_sim.start_stream('simxGetVisionSensorImage',
+                                              handle, grayscale)
+                vrep_sim.get_ping_time()
+        else:
+            with vrep_sim.pause_comm():
+                for handle in handles:
+                    vrep.simxGetVisionSensorImage(client_id, handle, grayscale,
+                                                  vrep.simx_opmode_oneshot)
+            vrep_sim.get_ping_time()
+
+        # Retrieve images together with V-REP simulation times at which they
+        # were captured
+        images = []
+        times = np.empty(len(handles))
+        for s, handle in enumerate(handles):
+            res, resolution, image = vrep.simxGetVisionSensorImage(
+                client_id, handle, grayscale, vrep.simx_opmode_buffer)
+            if res != vrep.simx_return_ok:
+                raise ServerError("Could not retrieve image from {}."
+                                  "".format(self._sensors[s]._name))
+            times[s] = vrep.simxGetLastCmdTime(client_id) / 1000.0
+            width, height = resolution
+            image = np.array(image, dtype=np.int8).view(np.uint8)
+            if grayscale:
+                images.append(image.reshape(height, width)[::-1])
+            else:
+                images.append(image.reshape(height, width, 3)[::-1])
+        if same_time and np.any(times != times[0]):
+            raise SimulationError("Could not retrieve images from array of "
+                                  "sensors: images captured at different "
+                                  "V-REP simulation times.")
+        try:
+            return np.stack(images), times
+        except ValueError:
+            raise RuntimeError("Could not retrieve images from array of "
+                               "sensors: resolutions of sensors differ.")
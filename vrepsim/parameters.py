@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Batched access to parameters of scene objects simulated in V-REP.
+
+Batched access to parameters of scene objects simulated in V-REP provides the
+following functionality:
+
+- collecting writes of float and integer parameters of multiple scene objects
+  and sending them together;
+- reading float and integer parameters of multiple scene objects together as
+  NumPy arrays.
+
+Collected writes are sent in non-blocking mode with communication paused, so
+that they are sent to V-REP in a single packet, e.g., when randomizing masses,
+friction or vision sensor parameters of many scene objects on each reset.
+Parameters are read using a single data exchange with V-REP.
+"""
+
+import numpy as np
+
+from vrepsim.backend import vrep
+from vrepsim.base import Communicator
+from vrepsim.exceptions import ConnectionError, ServerError
+from vrepsim.objects import SceneObject, to_handle
+
+
+class ParameterBatch(Communicator):
+    """Batch of writes of parameters of scene objects simulated in V-REP.
+
+    Writes are collected by set_float and set_int and sent together by send,
+    which is also called when leaving the batch used as a context manager
+    without an exception.
+    """
+
+    def __init__(self, vrep_sim=None):
+        super(ParameterBatch, self).__init__(vrep_sim)
+        self._writes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.send()
+        else:
+            self.clear()
+
+    def __len__(self):
+        """Retrieve number of collected writes."""
+        return len(self._writes)
+
+    def clear(self):
+        """Discard collected writes."""
+        self._writes = []
+
+    def get_floats(self, objects, params):
+        """Read float parameters of scene objects together as a NumPy array
+        of shape (N,) for a single parameter or (N, P) for a sequence of
+        parameters.
+        """
+        return self._get(objects, params, 'simxGetObjectFloatParameter',
+                         float)
+
+    def get_ints(self, objects, params):
+        """Read integer parameters of scene objects together as a NumPy array
+        of shape (N,) for a single parameter or (N, P) for a sequence of
+        parameters.
+        """
+        return self._get(objects, params, 'simxGetObjectIntParameter', int)
+
+    def send(self):
+        """Send collected writes using a single data exchange with V-REP
+        without waiting for V-REP to confirm them.
+        """
+        if not self._writes:
+            return
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError("Could not set parameters: not connected to "
+                                  "V-REP remote API server.")
+        writes, self._writes = self._writes, []
+        results = []
+        with self.vrep_sim.pause_comm():
+            for funcname, handle, param, value in writes:
+                results.append(getattr(vrep, funcname)(
+                    client_id, handle, param, value,
+                    vrep.simx_opmode_oneshot))
+        for res in results:
+            if res not in (vrep.simx_return_ok, vrep.simx_return_novalue_flag):
+                raise ServerError("Could not set parameters.")
+
+    def set_float(self, objects, param, values):
+        """Collect writes of float parameter of one or more scene objects,
+        with one value for all scene objects or one value per scene object.
+        """
+        self._add(objects, param, values, 'simxSetObjectFloatParameter',
+                  float)
+
+    def set_int(self, objects, param, values):
+        """Collect writes of integer parameter of one or more scene objects,
+        with one value for all scene objects or one value per scene object.
+        """
+        self._add(objects, param, values, 'simxSetObjectIntParameter', int)
+
+    def _add(self, objects, param, values, funcname, dtype):
+        """Collect writes of parameter of one scene object (or handle) or of
+        an iterable of scene objects.
+        """
+        if isinstance(objects, (SceneObject, int)):
+            handles = [to_handle(objects, "object")]
+        else:
+            handles = [to_handle(obj, "object") for obj in objects]
+        values = np.broadcast_to(np.asarray(values, dtype=dtype),
+                                 (len(handles),))
+        self._writes.extend((funcname, handle, int(param), value)
+                            for handle, value in zip(handles,
+                                                     values.tolist()))
+
+    def _get(self, objects, params, funcname, dtype):
+        """Read parameters of scene objects together as a NumPy array."""
+        handles = [to_handle(obj, "object") for obj in objects]
+        single = np.ndim(params) == 0
+        params = [int(param) for param in np.atleast_1d(params)]
+        results = self.vrep_sim.read_batch(
+            [(funcname, (handle, param))
+             for handle in handles for param in params])
+        values = np.empty(len(results), dtype=dtype)
+        for r, (res, value) in enumerate(results):
+            if res != vrep.simx_return_ok:
+                raise ServerError("Could not retrieve parameters.")
+            values[r] = value
+        values = values.reshape(len(handles), len(params))
+        return values[:, 0] if single else values
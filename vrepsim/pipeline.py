@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Pipeline processing images from vision sensor simulated in V-REP.
+
+Pipeline processing images from vision sensor simulated in V-REP provides the
+following functionality:
+
+- registering transforms applied to each image;
+- capturing images and processing them in a pool of background threads;
+- capturing images on each V-REP simulation step;
+- retrieving future processed images or the latest processed image.
+
+Images are captured in the calling thread, so that V-REP remote API is used
+only where the interface to V-REP remote API server is used, and processed in
+background threads while V-REP simulation advances. The number of images
+captured but not yet processed is bounded; once the bound is reached, the
+pipeline either waits for processing of an earlier image to finish or drops
+the captured image.
+"""
+
+import concurrent.futures
+import threading
+
+
+class ImagePipeline(object):
+    """Pipeline processing images from vision sensor simulated in V-REP."""
+
+    def __init__(self, sensor, transforms=(), grayscale=False, max_workers=2,
+                 max_pending=4, block=True):
+        self._sensor = sensor
+        self._transforms = list(transforms)
+        self._grayscale = grayscale
+        self._block = block
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._n_frames = 0
+        self._n_dropped = 0
+        self._latest = None
+        self._latest_frame = -1
+        self._vrep_sim = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def n_dropped(self):
+        """Number of images dropped since processing could not keep up."""
+        return self._n_dropped
+
+    @property
+    def n_frames(self):
+        """Number of images submitted for processing."""
+        return self._n_frames
+
+    @property
+    def sensor(self):
+        """Vision sensor from which images are captured."""
+        return self._sensor
+
+    @property
+    def transforms(self):
+        """Transforms applied to each image, in order."""
+        return list(self._transforms)
+
+    def add_transform(self, transform):
+        """Add transform applied to each image, taking and returning a NumPy
+        array.
+        """
+        self._transforms.append(transform)
+
+    def attach(self, vrep_sim):
+        """Attach pipeline to interface to V-REP remote API server so that an
+        image is captured before triggering each V-REP simulation step.
+        """
+        if self._vrep_sim is not None:
+            raise RuntimeError("Could not attach pipeline: pipeline already "
+                               "attached.")
+        vrep_sim.add_step_hook(self.capture)
+        self._vrep_sim = vrep_sim
+
+    def capture(self):
+        """Capture image from vision sensor and submit it for processing,
+        returning its future processed image, or None if it was dropped.
+        """
+        if not self._pending.acquire(blocking=self._block):
+            self._n_dropped += 1
+            return None
+        try:
+            image = self._sensor.get_image(grayscale=self._grayscale,
+                                           as_array=True)
+        except Exception:
+            self._pending.release()
+            raise
+        return self._submit(image)
+
+    def close(self, wait=True):
+        """Stop capturing images and shut down background threads, optionally
+        waiting for processing of submitted images to finish.
+        """
+        if self._vrep_sim is not None:
+            self.detach()
+        self._executor.shutdown(wait=wait)
+
+    def detach(self):
+        """Detach pipeline from interface to V-REP remote API server."""
+        if self._vrep_sim is None:
+            raise RuntimeError("Could not detach pipeline: pipeline not "
+                               "attached.")
+        self._vrep_sim.remove_step_hook(self.capture)
+        self._vrep_sim = None
+
+    def latest(self):
+        """Retrieve the latest processed image together with its frame
+        number, or None and -1 if no image has been processed yet.
+        """
+        with self._lock:
+            return self._latest, self._latest_frame
+
+    def submit(self, image):
+        """Submit image captured elsewhere for processing, returning its
+        future processed image, or None if it was dropped.
+        """
+        if not self._pending.acquire(blocking=self._block):
+            self._n_dropped += 1
+            return None
+        return self._submit(image)
+
+    def _process(self, frame, image):
+        """Apply transforms to image and store it if it is the latest one."""
+        try:
+            for transform in self._transforms:
+                image = transform(image)
+            with self._lock:
+                if frame > self._latest_frame:
+                    self._latest = image
+                    self._latest_frame = frame
+            return image
+        finally:
+            self._pending.release()
+
+    def _submit(self, image):
+        """Submit image for processing after a slot has been acquired."""
+        frame = self._n_frames
+        self._n_frames += 1
+        try:
+            return self._executor.submit(self._process, frame, image)
+        except Exception:
+            self._pending.release()
+            raise
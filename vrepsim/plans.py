@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Plans of reading and writing data of scene objects simulated in V-REP.
+
+Plans of reading and writing data of scene objects simulated in V-REP provide
+the following functionality:
+
+- declaring once which quantities of which scene objects are read or written;
+- compiling plans into callables that read all quantities into (or write all
+  quantities from) a preallocated NumPy array;
+- reading quantities either in non-blocking mode or from data streamed from
+  V-REP.
+
+Handles and arguments of V-REP remote API functions are resolved when a plan
+is compiled, so that calling the compiled plan only issues V-REP remote API
+calls and copies their results, without any of the per-call checks performed
+by interfaces to scene objects. V-REP remote API functions are looked up on
+each call of the compiled plan, so that calls are issued through the active
+backend (e.g., through the dispatcher or the profiler). A compiled read plan
+requests all quantities using a single data exchange with V-REP (or, when
+streaming, reads them from data already received, without any data exchange);
+a compiled write plan sends all quantities together in a single packet,
+without waiting for V-REP to confirm them. Compiled plans are bound to the
+connection they were compiled for and have to be compiled again after
+reconnecting.
+"""
+
+import numpy as np
+
+from vrepsim.backend import vrep
+from vrepsim.base import Communicator
+from vrepsim.exceptions import ConnectionError, ServerError
+from vrepsim.objects import to_handle
+
+
+def _read_scalar(result, out):
+    """Copy scalar result into buffer."""
+    out[0] = result[1]
+
+
+def _read_vector(result, out):
+    """Copy vector result into buffer."""
+    out[:] = result[1]
+
+
+def _read_distance(result, out):
+    """Copy distance to the detected point into buffer, or NaN if nothing is
+    detected.
+    """
+    out[0] = result[2][2] if result[1] else np.nan
+
+
+def _read_force(result, out):
+    """Copy force and torque vectors into buffer, or NaN if no data are
+    available.
+    """
+    if result[1] & 1:
+        out[:3] = result[2]
+        out[3:] = result[3]
+    else:
+        out[:] = np.nan
+
+
+# Quantities read by read plans: name of V-REP remote API function, whether
+# the function takes a handle to the reference frame, size and function
+# copying the result into buffer
+READ_QUANTITIES = {
+    'position': ('simxGetObjectPosition', True, 3, _read_vector),
+    'orientation': ('simxGetObjectOrientation', True, 3, _read_vector),
+    'joint_position': ('simxGetJointPosition', False, 1, _read_scalar),
+    'joint_velocity': ('simxGetObjectFloatParameter', False, 1,
+                       _read_scalar),
+    'joint_force': ('simxGetJointForce', False, 1, _read_scalar),
+    'float_param': ('simxGetObjectFloatParameter', False, 1, _read_scalar),
+    'int_param': ('simxGetObjectIntParameter', False, 1, _read_scalar),
+    'distance': ('simxReadProximitySensor', False, 1, _read_distance),
+    'force': ('simxReadForceSensor', False, 6, _read_force)
+    }
+
+# Quantities written by write plans: name of V-REP remote API function,
+# whether the function takes a handle to the reference frame, size and type
+# of values
+WRITE_QUANTITIES = {
+    'position': ('simxSetObjectPosition', True, 3, list),
+    'orientation': ('simxSetObjectOrientation', True, 3, list),
+    'joint_position': ('simxSetJointPosition', False, 1, float),
+    'joint_target_position': ('simxSetJointTargetPosition', False, 1, float),
+    'joint_target_velocity': ('simxSetJointTargetVelocity', False, 1, float),
+    'float_param': ('simxSetObjectFloatParameter', False, 1, float),
+    'int_param': ('simxSetObjectIntParameter', False, 1, int)
+    }
+
+
+class _Plan(Communicator):
+    """Generic plan of accessing data of scene objects simulated in V-REP."""
+
+    _quantities = {}
+
+    def __init__(self, vrep_sim=None):
+        super(_Plan, self).__init__(vrep_sim)
+        self._entries = []
+        self._size = 0
+
+    def __len__(self):
+        """Retrieve number of entries."""
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Number of values of all entries."""
+        return self._size
+
+    def add(self, obj, quantity, relative=None, param=None):
+        """Add entry specifying quantity of scene object (with position and
+        orientation relative to the specified reference frame, and parameter
+        quantities identified by the specified parameter ID), returning the
+        slice of the buffer holding its values.
+        """
+        if quantity not in self._quantities:
+            raise ValueError("Quantity is not supported.")
+        if quantity.endswith('_param'):
+            if param is None:
+                raise ValueError("Could not add {}: missing parameter ID."
+                                 "".format(quantity))
+        elif param is not None:
+            raise ValueError("Could not add {}: parameter ID not supported."
+                             "".format(quantity))
+        size = self._quantities[quantity][2]
+        values = slice(self._size, self._size + size)
+        self._entries.append((obj, quantity, relative, param, values))
+        self._size += size
+        return values
+
+    def _compile_calls(self):
+        """Resolve names of V-REP remote API functions and their arguments
+        (following client ID) of all entries.
+        """
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError("Could not compile plan: not connected to "
+                                  "V-REP remote API server.")
+        if not self._entries:
+            raise RuntimeError("Could not compile plan: missing entries.")
+        calls = []
+        for obj, quantity, relative, param, values in self._entries:
+            funcname, takes_relative, _, extra = self._quantities[quantity]
+            args = (to_handle(obj, "object"),)
+            if takes_relative:
+                args += (to_handle(relative, "relative"),)
+            if quantity == 'joint_velocity':
+                args += (vrep.sim_jointfloatparam_velocity,)
+            elif param is not None:
+                args += (int(param),)
+            calls.append((funcname, args, values, extra))
+        return client_id, calls
+
+
+class ReadPlan(_Plan):
+    """Plan of reading data of scene objects simulated in V-REP.
+
+    Supported quantities are: 'position', 'orientation', 'joint_position',
+    'joint_velocity', 'joint_force', 'float_param' and 'int_param' (of generic
+    scene objects), 'distance' (of proximity sensors, NaN if nothing is
+    detected) and 'force' (force and torque vectors of force sensors, NaN if
+    no data are available).
+    """
+
+    _quantities = READ_QUANTITIES
+
+    def compile(self, streaming=False):
+        """Compile plan into a callable reading all quantities into a NumPy
+        array (preallocated, unless specified) and returning it.
+
+        If streaming, streaming is started for all quantities together when
+        compiling, and quantities are then read from data already received.
+        """
+        client_id, calls = self._compile_calls()
+        vrep_sim = self.vrep_sim
+        size = self._size
+        buffer = np.empty(size)
+        opmode_oneshot = vrep.simx_opmode_oneshot
+        opmode_buffer = vrep.simx_opmode_buffer
+        return_ok = vrep.simx_return_ok
+        reads = [(funcname, (client_id,) + args + (opmode_oneshot,),
+                  (client_id,) + args + (opmode_buffer,), extra,
+                  buffer[values])
+                 for funcname, args, values, extra in calls]
+        if streaming:
+            with vrep_sim.pause_comm():
+                for funcname, args, _, _ in calls:
+                    vrep_sim.start_stream(funcname, *args)
+            vrep_sim.get_ping_time()
+
+        def read(out=None):
+            """Read all quantities of the plan."""
+            if vrep_sim.client_id != client_id:
+                raise ConnectionError("Could not read data: plan not "
+                                      "compiled for the current connection.")
+            if not streaming:
+                with vrep_sim.pause_comm():
+                    for funcname, oneshot_args, _, _, _ in reads:
+                        getattr(vrep, funcname)(*oneshot_args)
+                vrep_sim.get_ping_time()
+            for funcname, _, buffer_args, extra, values in reads:
+                result = getattr(vrep, funcname)(*buffer_args)
+                if result[0] != return_ok:
+                    raise ServerError("Could not read data by {}."
+                                      "".format(funcname))
+                extra(result, values)
+            if out is None:
+                return buffer
+            out[:size] = buffer
+            return out
+
+        return read
+
+
+class WritePlan(_Plan):
+    """Plan of writing data of scene objects simulated in V-REP.
+
+    Supported quantities are: 'position', 'orientation', 'joint_position',
+    'joint_target_position', 'joint_target_velocity', 'float_param' and
+    'int_param'.
+    """
+
+    _quantities = WRITE_QUANTITIES
+
+    def compile(self):
+        """Compile plan into a callable writing all quantities from a NumPy
+        array (or any sequence of numbers) holding values of all entries.
+        """
+        client_id, calls = self._compile_calls()
+        vrep_sim = self.vrep_sim
+        size = self._size
+        opmode_oneshot = vrep.simx_opmode_oneshot
+        accepted = (vrep.simx_return_ok, vrep.simx_return_novalue_flag)
+        writes = [(funcname, (client_id,) + args, values.start, values.stop,
+                   values.stop - values.start > 1, convert)
+                  for funcname, args, values, convert in calls]
+
+        def write(values):
+            """Write all quantities of the plan."""
+            if len(values) != size:
+                raise ValueError("Number of values does not match the size "
+                                 "of the plan.")
+            if vrep_sim.client_id != client_id:
+                raise ConnectionError("Could not write data: plan not "
+                                      "compiled for the current connection.")
+            values = np.asarray(values, dtype=float).tolist()
+            results = []
+            with vrep_sim.pause_comm():
+                for funcname, args, start, stop, vector, convert in writes:
+                    value = (values[start:stop] if vector
+                             else convert(values[start]))
+                    results.append((funcname, getattr(vrep, funcname)(
+                        *(args + (value, opmode_oneshot)))))
+            for funcname, res in results:
+                if res not in accepted:
+                    raise ServerError("Could not write data by {}."
+                                      "".format(funcname))
+
+        return write
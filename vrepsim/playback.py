@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""Playback of trajectories of scene objects simulated in V-REP.
+
+Playback of trajectories of scene objects simulated in V-REP provides the
+following functionality:
+
+- setting poses of multiple scene objects on each V-REP simulation step from
+  precomputed trajectories;
+- interpolating poses between keyframes;
+- looping trajectories;
+- seeking within trajectories.
+
+Poses of all scene objects are sent before triggering each V-REP simulation
+step in non-blocking mode with communication paused, so that they are sent
+together with the trigger and playback never waits for V-REP to reply,
+regardless of the number of scene objects.
+"""
+
+import math
+
+import numpy as np
+
+from vrepsim.backend import vrep
+from vrepsim.base import Communicator
+from vrepsim.exceptions import ConnectionError, ServerError
+from vrepsim.objects import to_handle
+
+
+class TrajectoryPlayer(Communicator):
+    """Player of trajectories of scene objects simulated in V-REP.
+
+    Poses are specified as an array of shape (T, N, 6) holding, for each of T
+    keyframes and each of N scene objects, the position and the orientation
+    (Euler angles about x, y, and z axes) relative to the reference frame. If
+    times of keyframes (in seconds of V-REP simulation time) are not
+    specified, keyframes are played on consecutive V-REP simulation steps;
+    otherwise, poses are linearly interpolated between keyframes.
+    """
+
+    def __init__(self, objects, poses, times=None, loop=False, relative=None,
+                 vrep_sim=None):
+        super(TrajectoryPlayer, self).__init__(vrep_sim)
+        self._objects = list(objects)
+        self._poses = np.asarray(poses, dtype=float)
+        if self._poses.ndim != 3 or self._poses.shape[1:] != (
+                len(self._objects), 6):
+            raise ValueError("Shape of poses does not match the number of "
+                             "objects.")
+        if times is not None:
+            times = np.asarray(times, dtype=float)
+            if times.shape != self._poses.shape[:1]:
+                raise ValueError("Number of times of keyframes does not "
+                                 "match the number of keyframes.")
+            if np.any(np.diff(times) <= 0):
+                raise ValueError("Times of keyframes must be increasing.")
+        self._times = times
+        self._loop = loop
+        self._relative = relative
+        self._handles = None
+        self._sim_dt = None
+        self._step = 0
+        self._attached = False
+
+    @property
+    def attached(self):
+        """Player attached status."""
+        return self._attached
+
+    @property
+    def duration(self):
+        """Duration of trajectories in V-REP simulation time (in seconds), or
+        number of keyframes if times of keyframes are not specified.
+        """
+        if self._times is None:
+            return len(self._poses)
+        return self._times[-1] - self._times[0]
+
+    @property
+    def finished(self):
+        """Player finished status, which is never set when looping."""
+        if self._loop or (self._times is not None and self._sim_dt is None):
+            return False
+        return self.get_poses(self._step) is None
+
+    @property
+    def loop(self):
+        """Looping trajectories."""
+        return self._loop
+
+    @property
+    def step(self):
+        """Number of V-REP simulation steps played so far."""
+        return self._step
+
+    def attach(self):
+        """Start playing trajectories, setting poses before triggering each
+        V-REP simulation step.
+        """
+        if self._attached:
+            raise RuntimeError("Could not attach player: player already "
+                               "attached.")
+        if self._handles is None:
+            self._handles = [to_handle(obj, "object") for obj in self._objects]
+        if self._times is not None and self._sim_dt is None:
+            self._sim_dt = self.vrep_sim.get_sim_dt()
+        self.vrep_sim.add_step_hook(self.play_step)
+        self._attached = True
+
+    def detach(self):
+        """Stop playing trajectories."""
+        if not self._attached:
+            raise RuntimeError("Could not detach player: player not "
+                               "attached.")
+        self.vrep_sim.remove_step_hook(self.play_step)
+        self._attached = False
+
+    def get_poses(self, step):
+        """Retrieve poses of all scene objects on V-REP simulation step of
+        playback, or None if playback has finished by then.
+        """
+        # Select keyframe if times of keyframes are not specified
+        poses = self._poses
+        if self._times is None:
+            if self._loop:
+                step %= len(poses)
+            elif step >= len(poses):
+                return None
+            return poses[step]
+
+        # Determine time within trajectories
+        times = self._times
+        if self._sim_dt is None:
+            self._sim_dt = self.vrep_sim.get_sim_dt()
+        t = step * self._sim_dt
+        duration = times[-1] - times[0]
+        if self._loop and duration > 0:
+            t %= duration
+        elif t > duration + 1e-9:
+            return None
+        t += times[0]
+
+        # Interpolate poses between the surrounding keyframes, with angles
+        # interpolated along the shorter arc
+        if len(times) == 1:
+            return poses[0]
+        k = int(np.searchsorted(times, t, 'right')) - 1
+        k = min(max(k, 0), len(times) - 2)
+        frac = min(max((t - times[k]) / (times[k+1] - times[k]), 0.0), 1.0)
+        start, end = poses[k], poses[k+1]
+        result = np.empty_like(start)
+        result[:, :3] = start[:, :3] + frac * (end[:, :3] - start[:, :3])
+        diff = (end[:, 3:] - start[:, 3:] + math.pi) % (2 * math.pi) - math.pi
+        result[:, 3:] = ((start[:, 3:] + frac * diff + math.pi)
+                         % (2 * math.pi) - math.pi)
+        return result
+
+    def play_step(self):
+        """Send poses of all scene objects for the next V-REP simulation step
+        without waiting for V-REP to confirm them.
+        """
+        poses = self.get_poses(self._step)
+        if poses is None:
+            return
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError("Could not play trajectories: not connected "
+                                  "to V-REP remote API server.")
+        if self._handles is None:
+            self._handles = [to_handle(obj, "object") for obj in self._objects]
+        relative_handle = to_handle(self._relative, "relative")
+        results = []
+        with self.vrep_sim.pause_comm():
+            for handle, pose in zip(self._handles, poses.tolist()):
+                results.append(vrep.simxSetObjectPosition(
+                    client_id, handle, relative_handle, pose[:3],
+                    vrep.simx_opmode_oneshot))
+                results.append(vrep.simxSetObjectOrientation(
+                    client_id, handle, relative_handle, pose[3:],
+                    vrep.simx_opmode_oneshot))
+        for res in results:
+            if res not in (vrep.simx_return_ok, vrep.simx_return_novalue_flag):
+                raise ServerError("Could not play trajectories.")
+        self._step += 1
+
+    def seek(self, step):
+        """Move to V-REP simulation step of playback."""
+        if step < 0:
+            raise ValueError("Step of playback must not be negative.")
+        self._step = int(step)
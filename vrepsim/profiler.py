@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""Profiler of time spent on V-REP simulation steps.
+
+Profiler of time spent on V-REP simulation steps provides the following
+functionality:
+
+- attributing wall time of each V-REP simulation step to computation by V-REP
+  remote API server, data transport and client code;
+- retrieving histograms of attributed times over recent V-REP simulation
+  steps;
+- retrieving summary statistics of attributed times;
+- exporting attributed times and histograms to file.
+
+Each V-REP simulation step is measured from the end of the previous one. After
+triggering a step, the profiler waits for V-REP remote API server to finish it
+by retrieving ping time. Server time is the difference between server
+timestamps in the headers of the replies to the trigger and to the ping
+(which have millisecond resolution). Transport time is the remaining time spent
+waiting for the step plus the time spent in blocking V-REP remote API calls
+issued between steps, which the profiler measures while it is attached by
+wrapping the active backend providing V-REP remote API. Client time is the
+remaining wall time.
+"""
+
+import time
+
+import numpy as np
+
+from vrepsim.backend import add_wrapper, get_backend, remove_wrapper, vrep
+from vrepsim.base import Communicator
+
+COMPONENTS = ('server', 'transport', 'client')
+
+# Clock with the highest available resolution (time.perf_counter is not
+# available on Python 2)
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class ProfilingAPI(object):
+    """V-REP remote API measuring time spent in blocking calls."""
+
+    def __init__(self, profiler, api):
+        self._profiler = profiler
+        self._api = api
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not name.startswith('simx') or not callable(attr):
+            return attr
+        profiler = self._profiler
+        opmode_blocking = self._api.simx_opmode_blocking
+
+        def call(*args):
+            if not args or args[-1] != opmode_blocking:
+                return attr(*args)
+            start = _clock()
+            try:
+                return attr(*args)
+            finally:
+                profiler.add_comm_time(_clock() - start)
+
+        return call
+
+
+class StepProfiler(Communicator):
+    """Profiler of time spent on V-REP simulation steps."""
+
+    def __init__(self, window=1000, bins=None, vrep_sim=None):
+        super(StepProfiler, self).__init__(vrep_sim)
+        self._window = int(window)
+        if bins is None:
+            bins = np.logspace(-5, 1, 61)  # from 10 us to 10 s
+        self._bins = np.asarray(bins, dtype=float)
+        self._times = np.zeros((self._window, len(COMPONENTS)))
+        self._n_steps = 0
+        self._api = None
+        self._wrapper = None
+        self._attached = False
+        self._step_start = None
+        self._trig_start = None
+        self._comm_time = 0.0
+
+    @property
+    def attached(self):
+        """Profiler attached status."""
+        return self._attached
+
+    @property
+    def bins(self):
+        """Edges of histogram bins in seconds."""
+        return self._bins
+
+    @property
+    def n_steps(self):
+        """Number of V-REP simulation steps measured so far."""
+        return self._n_steps
+
+    @property
+    def times(self):
+        """Times attributed to components of recent V-REP simulation steps,
+        in seconds, ordered from the oldest step.
+        """
+        if self._n_steps <= self._window:
+            return self._times[:self._n_steps].copy()
+        start = self._n_steps % self._window
+        return np.roll(self._times, -start, axis=0)
+
+    def add_comm_time(self, comm_time):
+        """Add time spent in blocking V-REP remote API call."""
+        self._comm_time += comm_time
+
+    def attach(self):
+        """Start measuring V-REP simulation steps."""
+        if self._attached:
+            raise RuntimeError("Could not attach profiler: profiler already "
+                               "attached.")
+        self._api = get_backend()
+        self._wrapper = ProfilingAPI(self, self._api)
+        add_wrapper(self._wrapper, self.detach)
+        self._vrep_sim.add_step_hook(self._before_step)
+        self._vrep_sim.add_step_hook(self._after_step, after=True)
+        self._attached = True
+        self._step_start = None
+        self._comm_time = 0.0
+
+    def detach(self):
+        """Stop measuring V-REP simulation steps."""
+        if not self._attached:
+            raise RuntimeError("Could not detach profiler: profiler not "
+                               "attached.")
+        remove_wrapper(self._wrapper)
+        self._wrapper = None
+        self._vrep_sim.remove_step_hook(self._before_step)
+        self._vrep_sim.remove_step_hook(self._after_step)
+        self._attached = False
+
+    def export(self, filename):
+        """Export attributed times and their histograms to .npz file."""
+        data = {'components': np.array(COMPONENTS), 'bins': self._bins,
+                'times': self.times}
+        for component in COMPONENTS:
+            data['hist_' + component] = self.histogram(component)[0]
+        np.savez(filename, **data)
+
+    def histogram(self, component):
+        """Retrieve histogram of times attributed to component of recent
+        V-REP simulation steps.
+        """
+        try:
+            c = COMPONENTS.index(component)
+        except ValueError:
+            raise ValueError("Component is not supported.")
+        counts, edges = np.histogram(self.times[:, c], self._bins)
+        return counts, edges
+
+    def reset(self):
+        """Discard measured times."""
+        self._n_steps = 0
+        self._step_start = None
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """Retrieve summary statistics of times attributed to components of
+        recent V-REP simulation steps.
+        """
+        times = self.times
+        summary = {'n_steps': len(times)}
+        for c, component in enumerate(COMPONENTS):
+            if len(times):
+                stats = {'mean': float(times[:, c].mean())}
+                for p, value in zip(percentiles,
+                                    np.percentile(times[:, c], percentiles)):
+                    stats['p{}'.format(p)] = float(value)
+            else:
+                stats = {}
+            summary[component] = stats
+        return summary
+
+    def _before_step(self):
+        """Start measuring triggering V-REP simulation step."""
+        self._trig_start = _clock()
+
+    def _after_step(self):
+        """Wait for V-REP simulation step to finish and attribute its time."""
+        client_id = self.client_id
+
+        # Retrieve server timestamp of the reply to the trigger, and wait for
+        # the step to finish
+        res, trig_server_time = self._api.simxGetInMessageInfo(
+            client_id, vrep.simx_headeroffset_server_time)
+        self._api.simxGetPingTime(client_id)
+        step_end = _clock()
+        res_ping, ping_server_time = self._api.simxGetInMessageInfo(
+            client_id, vrep.simx_headeroffset_server_time)
+
+        # Attribute time of the step, the first step being measured only from
+        # triggering it
+        wait_time = step_end - self._trig_start
+        if res != -1 and res_ping != -1:
+            server_time = min(max(ping_server_time - trig_server_time, 0)
+                              / 1000.0, wait_time)
+        else:
+            server_time = 0.0
+        if self._step_start is not None:
+            step_time = step_end - self._step_start
+        else:
+            step_time = wait_time
+        transport_time = wait_time - server_time + self._comm_time
+        client_time = max(step_time - server_time - transport_time, 0.0)
+        self._times[self._n_steps % self._window] = (
+            server_time, transport_time, client_time)
+        self._n_steps += 1
+        self._step_start = step_end
+        self._comm_time = 0.0
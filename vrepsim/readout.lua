@@ -0,0 +1,95 @@
+-- V-REPSim: reduced readout of vision sensors simulated in V-REP.
+--
+-- For V-REPSim to retrieve reduced images and depth buffers, this code has to
+-- be attached as a customization script to a scene object named
+-- VREPSim_readout (e.g., a dummy object) in the scene simulated in V-REP.
+--
+-- Images and depth buffers are cropped to the region of interest, decimated
+-- and (in the case of depth buffers) quantized inside V-REP, and sent to the
+-- client packed in the output buffer. Regions of interest are specified in
+-- top-down row order, whereas V-REP stores pixels in bottom-up row order.
+
+-- Determine region of interest in V-REP pixel coordinates
+local function get_region(handle, x, y, width, height)
+    local resolution = sim.getVisionSensorResolution(handle)
+    if width <= 0 then
+        width = resolution[1] - x
+    end
+    if height <= 0 then
+        height = resolution[2] - y
+    end
+    return x, resolution[2] - y - height, width, height
+end
+
+-- Select every step-th pixel in every step-th row, keeping the top row
+local function decimate(values, width, height, step, n_channels)
+    if step <= 1 then
+        return values, width, height
+    end
+    local reduced = {}
+    local n = 0
+    local reduced_height = 0
+    for row = (height - 1) % step, height - 1, step do
+        reduced_height = reduced_height + 1
+        for col = 0, width - 1, step do
+            local p = (row * width + col) * n_channels
+            for c = 1, n_channels do
+                n = n + 1
+                reduced[n] = values[p+c]
+            end
+        end
+    end
+    return reduced, math.floor((width + step - 1) / step), reduced_height
+end
+
+-- Input integers: sensor handle, x, y, width, height, step, grayscale
+function vrepsim_readImage(inInts, inFloats, inStrings, inBuffer)
+    local handle = inInts[1]
+    local grayscale = inInts[7] ~= 0
+    local x, y, width, height = get_region(handle, inInts[2], inInts[3],
+                                           inInts[4], inInts[5])
+    local n_channels = 3
+    local sensor_handle = handle
+    if grayscale then
+        n_channels = 1
+        sensor_handle = handle + sim.handleflag_greyscale
+    end
+    local image = sim.getVisionSensorCharImage(sensor_handle, x, y, width,
+                                               height)
+    local reduced_width, reduced_height = width, height
+    if inInts[6] > 1 then
+        local values = sim.unpackUInt8Table(image)
+        values, reduced_width, reduced_height = decimate(
+            values, width, height, inInts[6], n_channels)
+        image = sim.packUInt8Table(values)
+    end
+    return {reduced_width, reduced_height}, {}, {}, image
+end
+
+-- Input integers: sensor handle, x, y, width, height, step, bits (0 for
+-- unquantized single-precision values)
+function vrepsim_readDepthBuffer(inInts, inFloats, inStrings, inBuffer)
+    local handle = inInts[1]
+    local bits = inInts[7]
+    local x, y, width, height = get_region(handle, inInts[2], inInts[3],
+                                           inInts[4], inInts[5])
+    local values = sim.getVisionSensorDepthBuffer(handle, x, y, width, height)
+    local reduced_width, reduced_height
+    values, reduced_width, reduced_height = decimate(values, width, height,
+                                                     inInts[6], 1)
+    local buffer
+    if bits == 0 then
+        buffer = sim.packFloatTable(values)
+    else
+        local max_value = 2 ^ bits - 1
+        for i = 1, #values do
+            values[i] = math.floor(values[i] * max_value + 0.5)
+        end
+        if bits == 8 then
+            buffer = sim.packUInt8Table(values)
+        else
+            buffer = sim.packUInt16Table(values)
+        end
+    end
+    return {reduced_width, reduced_height}, {}, {}, buffer
+end
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""Recorder of data from V-REP simulations.
+
+Recorder of data from V-REP simulations provides the following functionality:
+
+- registering channels of data sampled on each V-REP simulation step;
+- registering channels of data retrieved from scene objects and collections
+  simulated in V-REP;
+- registering channels of data exchanged by Nengo communicator;
+- sampling data on V-REP simulation steps, optionally decimated;
+- writing sampled data to files in chunks.
+
+Sampled data are stored column-wise in preallocated NumPy arrays holding a
+fixed number of samples (chunks). Full chunks are written to files in a
+background thread, either as compressed .npz files or as directories of .npy
+files that can be memory-mapped when read. The number of chunks held in memory
+is limited, so that peak memory usage does not grow with the length of the
+recording; if all chunks are waiting to be written, sampling blocks until one
+of them is written.
+"""
+
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+STEP_CHANNEL = 'step'
+MANIFEST_FILENAME = 'manifest.json'
+
+
+def chunk_filename(chunk_index, fmt):
+    """Retrieve name of file (or directory) storing chunk of samples."""
+    if fmt == 'npz':
+        return "chunk_{:05d}.npz".format(chunk_index)
+    return "chunk_{:05d}".format(chunk_index)
+
+
+class Recorder(object):
+    """Recorder of data from V-REP simulations."""
+
+    FORMATS = ('npz', 'npy')
+
+    def __init__(self, path, chunk_size=1000, decimation=1, fmt='npz',
+                 max_chunks=2):
+        if fmt not in self.FORMATS:
+            raise ValueError("Format is not supported.")
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive.")
+        if decimation < 1:
+            raise ValueError("Decimation must be positive.")
+        if max_chunks < 1:
+            raise ValueError("Maximum number of chunks must be positive.")
+        self._path = path
+        self._chunk_size = int(chunk_size)
+        self._decimation = int(decimation)
+        self._fmt = fmt
+        self._max_chunks = int(max_chunks)
+        self._channels = [(STEP_CHANNEL, None, (), np.dtype(np.int64))]
+        self._collections = {}
+        self._sim_dt = None
+        self._vrep_sim = None
+        self._step = 0
+        self._started = False
+        self._closed = False
+        self._free_chunks = None
+        self._pending_chunks = None
+        self._chunk = None
+        self._chunk_index = 0
+        self._n_samples = 0
+        self._chunks_written = []
+        self._writer = None
+        self._writer_error = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def channels(self):
+        """Names of recorded channels."""
+        return [channel[0] for channel in self._channels]
+
+    @property
+    def chunk_size(self):
+        """Number of samples per chunk."""
+        return self._chunk_size
+
+    @property
+    def decimation(self):
+        """Number of V-REP simulation steps per sample."""
+        return self._decimation
+
+    @property
+    def n_samples(self):
+        """Number of samples taken so far."""
+        return self._chunk_index * self._chunk_size + self._n_samples
+
+    @property
+    def path(self):
+        """Directory to which recorded data are written."""
+        return self._path
+
+    def add_channel(self, name, getter, shape=(), dtype=np.float64):
+        """Add channel of data returned by the specified function."""
+        if self._started:
+            raise RuntimeError("Could not add channel {}: recording already "
+                               "started.".format(name))
+        if name in self.channels:
+            raise ValueError("Could not add channel {}: channel already "
+                             "added.".format(name))
+        if not name or os.sep in name or name == MANIFEST_FILENAME:
+            raise ValueError("Could not add channel {}: invalid name."
+                             "".format(name))
+        self._channels.append((name, getter, tuple(shape), np.dtype(dtype)))
+
+    def add_depth_buffer(self, sensor):
+        """Add channel of depth buffers retrieved from vision sensor."""
+        resolution_x, resolution_y = sensor.get_resolution()
+        self.add_channel("{}.depth".format(sensor.name),
+                         lambda: sensor.get_depth_buffer(as_array=True),
+                         (resolution_y, resolution_x), np.float32)
+
+    def add_distance(self, sensor, fast=True):
+        """Add channel of distances to the detected point retrieved from
+        proximity sensor, with missing detections stored as NaN.
+        """
+        def get_distance():
+            distance = sensor.get_distance(fast=fast)
+            return distance if distance is not None else np.nan
+
+        self.add_channel("{}.distance".format(sensor.name), get_distance)
+
+    def add_distances(self, sensor_array, fast=True):
+        """Add channels of distances to the detected points retrieved from all
+        sensors in array of proximity sensors.
+        """
+        for sensor in sensor_array:
+            self.add_distance(sensor, fast)
+
+    def add_image(self, sensor, grayscale=False):
+        """Add channel of images retrieved from vision sensor."""
+        resolution_x, resolution_y = sensor.get_resolution()
+        if grayscale:
+            shape = (resolution_y, resolution_x)
+        else:
+            shape = (resolution_y, resolution_x, 3)
+        self.add_channel(
+            "{}.image".format(sensor.name),
+            lambda: sensor.get_image(grayscale=grayscale, as_array=True),
+            shape, np.uint8)
+
+    def add_nengo_comm(self, nengo_comm, name='nengo'):
+        """Add channels of input data to and output data from V-REP exchanged
+        by Nengo communicator.
+        """
+        self.add_channel("{}.input".format(name), lambda: nengo_comm.input,
+                         (nengo_comm.size_in,))
+        self.add_channel("{}.output".format(name), lambda: nengo_comm.output,
+                         (nengo_comm.size_out,))
+
+    def add_orientation(self, obj):
+        """Add channel of orientations retrieved from scene object."""
+        self.add_channel("{}.orientation".format(obj.name),
+                         obj.get_orientation, (3,))
+
+    def add_orientations(self, collection):
+        """Add channel of orientations retrieved from collection."""
+        names = collection.get_names()
+        self.add_channel("{}.orientations".format(collection.name),
+                         collection.get_orientations, (len(names), 3))
+        self._collections[collection.name] = names
+
+    def add_position(self, obj):
+        """Add channel of positions retrieved from scene object."""
+        self.add_channel("{}.position".format(obj.name), obj.get_position,
+                         (3,))
+
+    def add_positions(self, collection):
+        """Add channel of positions retrieved from collection."""
+        names = collection.get_names()
+        self.add_channel("{}.positions".format(collection.name),
+                         collection.get_positions, (len(names), 3))
+        self._collections[collection.name] = names
+
+    def attach(self, vrep_sim):
+        """Attach recorder to interface to V-REP remote API server so that
+        data are sampled before triggering each V-REP simulation step.
+        """
+        if self._vrep_sim is not None:
+            raise RuntimeError("Could not attach recorder: recorder already "
+                               "attached.")
+        if self._sim_dt is None:
+            self._sim_dt = vrep_sim.get_sim_dt()
+        vrep_sim.add_step_hook(self._on_step)
+        self._vrep_sim = vrep_sim
+
+    def detach(self):
+        """Detach recorder from interface to V-REP remote API server."""
+        if self._vrep_sim is None:
+            raise RuntimeError("Could not detach recorder: recorder not "
+                               "attached.")
+        self._vrep_sim.remove_step_hook(self._on_step)
+        self._vrep_sim = None
+
+    def sample(self):
+        """Sample data from all channels."""
+        if self._closed:
+            raise RuntimeError("Could not sample data: recorder closed.")
+        if not self._started:
+            self._start()
+        self._check_writer()
+
+        # Store data from all channels in the current row of the chunk
+        row = self._n_samples
+        self._chunk[STEP_CHANNEL][row] = self._step
+        for name, getter, _, _ in self._channels[1:]:
+            self._chunk[name][row] = getter()
+        self._n_samples += 1
+
+        # If the chunk is full, pass it for writing and take another one
+        if self._n_samples == self._chunk_size:
+            self._pending_chunks.put(
+                (self._chunk_index, self._chunk, self._n_samples))
+            self._chunk_index += 1
+            self._n_samples = 0
+            self._chunk = self._take_free_chunk()
+
+    def close(self):
+        """Write remaining data and stop recording."""
+        if self._closed:
+            return
+        if self._vrep_sim is not None:
+            self.detach()
+        self._closed = True
+        if not self._started:
+            return
+        if self._n_samples:
+            self._pending_chunks.put(
+                (self._chunk_index, self._chunk, self._n_samples))
+            self._chunk_index += 1
+            self._n_samples = 0
+        self._pending_chunks.put(None)
+        self._writer.join()
+        self._check_writer()
+
+    def _check_writer(self):
+        """Reraise error that occurred while writing chunk."""
+        if self._writer_error is not None:
+            error = self._writer_error
+            self._writer_error = None
+            raise error
+
+    def _on_step(self):
+        """Sample data on V-REP simulation step if due."""
+        if not self._step % self._decimation:
+            self.sample()
+        self._step += 1
+
+    def _start(self):
+        """Allocate chunks and start writing thread."""
+        if not os.path.isdir(self._path):
+            os.makedirs(self._path)
+        self._free_chunks = queue.Queue()
+        self._pending_chunks = queue.Queue()
+        for _ in range(self._max_chunks):
+            self._free_chunks.put(
+                {name: np.empty((self._chunk_size,) + shape, dtype)
+                 for name, _, shape, dtype in self._channels})
+        self._chunk = self._free_chunks.get()
+        self._writer = threading.Thread(target=self._write_chunks)
+        self._writer.daemon = True
+        self._writer.start()
+        self._started = True
+
+    def _take_free_chunk(self):
+        """Take chunk that is not waiting to be written, waiting for one if
+        necessary.
+        """
+        while True:
+            try:
+                return self._free_chunks.get(timeout=0.1)
+            except queue.Empty:
+                if not self._writer.is_alive():
+                    self._check_writer()
+                    raise RuntimeError("Could not take chunk: writing thread "
+                                       "stopped.")
+
+    def _write_chunks(self):
+        """Write chunks passed for writing until no more chunks are
+        expected.
+        """
+        while True:
+            item = self._pending_chunks.get()
+            if item is None:
+                break
+            chunk_index, chunk, n_samples = item
+            try:
+                self._write_chunk(chunk_index, chunk, n_samples)
+            except Exception as error:
+                self._writer_error = error
+            self._free_chunks.put(chunk)
+
+    def _write_chunk(self, chunk_index, chunk, n_samples):
+        """Write chunk and update manifest."""
+        filename = chunk_filename(chunk_index, self._fmt)
+        filepath = os.path.join(self._path, filename)
+        columns = {name: chunk[name][:n_samples] for name in chunk}
+        if self._fmt == 'npz':
+            np.savez_compressed(filepath, **columns)
+        else:
+            if not os.path.isdir(filepath):
+                os.makedirs(filepath)
+            for name, column in columns.items():
+                np.save(os.path.join(filepath, name + '.npy'), column)
+        self._chunks_written.append({'file': filename,
+                                     'n_samples': n_samples})
+        self._write_manifest()
+
+    def _write_manifest(self):
+        """Write description of recorded data."""
+        manifest = {
+            'format': self._fmt,
+            'decimation': self._decimation,
+            'sim_dt': self._sim_dt,
+            'chunk_size': self._chunk_size,
+            'channels': [{'name': name, 'shape': list(shape),
+                          'dtype': dtype.str}
+                         for name, _, shape, dtype in self._channels],
+            'collections': self._collections,
+            'chunks': self._chunks_written
+            }
+        tmp_filepath = os.path.join(self._path, MANIFEST_FILENAME + '.tmp')
+        with open(tmp_filepath, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(tmp_filepath, os.path.join(self._path, MANIFEST_FILENAME))
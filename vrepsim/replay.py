@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+"""Replay of data recorded from V-REP simulations.
+
+Replay of data recorded from V-REP simulations provides the following
+functionality:
+
+- reading data recorded by recorder of data from V-REP simulations;
+- serving recorded data through V-REP remote API;
+- interface to V-REP remote API server replaying recorded data.
+
+Interfaces to scene objects, arrays of sensors and collections created for
+interface to V-REP remote API server replaying recorded data retrieve recorded
+data instead of communicating with V-REP, and triggering a V-REP simulation
+step advances replay to the next recorded sample. Recorded data are read from
+memory-mapped .npy files (or, if recorded as compressed .npz files, loaded one
+chunk at a time), so that controllers can be run offline without V-REP.
+"""
+
+import json
+import os
+
+import numpy as np
+
+try:
+    import vrepConst
+except ImportError:
+    from vrepsim import apiconst as vrepConst
+
+from vrepsim.recorder import MANIFEST_FILENAME, STEP_CHANNEL
+from vrepsim.simulator import Simulator
+
+OBJECT_CHANNELS = ('position', 'orientation', 'distance', 'image', 'depth')
+COLLECTION_CHANNELS = ('positions', 'orientations')
+FIRST_OBJECT_HANDLE = 1
+FIRST_COLLECTION_HANDLE = 2000000
+
+
+class ReplayData(object):
+    """Data recorded from V-REP simulation."""
+
+    def __init__(self, path):
+        self._path = path
+        with open(os.path.join(path, MANIFEST_FILENAME), 'r') as \
+                manifest_file:
+            manifest = json.load(manifest_file)
+        self._fmt = manifest['format']
+        self._chunk_size = manifest['chunk_size']
+        self._sim_dt = manifest.get('sim_dt')
+        self._decimation = manifest.get('decimation', 1)
+        self._collections = manifest.get('collections', {})
+        self._channels = {channel['name']: (tuple(channel['shape']),
+                                            np.dtype(channel['dtype']))
+                          for channel in manifest['channels']}
+        self._chunk_files = [chunk['file'] for chunk in manifest['chunks']]
+        self._n_samples = sum(chunk['n_samples']
+                              for chunk in manifest['chunks'])
+        self._columns = {}
+        self._loaded_chunk = None
+
+    def __contains__(self, item):
+        """Check if specific channel has been recorded."""
+        return item in self._channels
+
+    def __len__(self):
+        """Retrieve number of recorded samples."""
+        return self._n_samples
+
+    @property
+    def channels(self):
+        """Names of recorded channels."""
+        return list(self._channels)
+
+    @property
+    def collections(self):
+        """Names of scene objects in recorded collections."""
+        return self._collections
+
+    @property
+    def path(self):
+        """Directory from which recorded data are read."""
+        return self._path
+
+    @property
+    def sim_dt(self):
+        """Time between recorded samples, or None if unknown."""
+        if self._sim_dt is None:
+            return None
+        return self._sim_dt * self._decimation
+
+    def get(self, name, index):
+        """Retrieve recorded sample from channel."""
+        if name not in self._channels:
+            raise KeyError("Channel {} has not been recorded.".format(name))
+        if not 0 <= index < self._n_samples:
+            raise IndexError("Sample index out of range.")
+        chunk_index, row = divmod(index, self._chunk_size)
+        return self._get_column(chunk_index, name)[row]
+
+    def get_shape(self, name):
+        """Retrieve shape of recorded samples from channel."""
+        return self._channels[name][0]
+
+    def _get_column(self, chunk_index, name):
+        """Retrieve recorded chunk of samples from channel."""
+        key = (chunk_index, name)
+        try:
+            return self._columns[key]
+        except KeyError:
+            pass
+        filepath = os.path.join(self._path, self._chunk_files[chunk_index])
+        if self._fmt == 'npy':
+            column = np.load(os.path.join(filepath, name + '.npy'),
+                             mmap_mode='r')
+        else:
+            # Compressed chunks cannot be memory-mapped, so keep only the
+            # columns of the most recently used chunk in memory
+            if self._loaded_chunk != chunk_index:
+                self._columns.clear()
+                self._loaded_chunk = chunk_index
+            with np.load(filepath) as chunk:
+                column = chunk[name]
+        self._columns[key] = column
+        return column
+
+
+class ReplayAPI(object):
+    """V-REP remote API serving data recorded from V-REP simulation."""
+
+    CLIENT_ID = 0
+    SCENE_ID = 0
+
+    def __init__(self, data, loop=False, sim_dt=None):
+        self._data = data
+        self._loop = loop
+        if sim_dt is not None:
+            self._sim_dt = sim_dt
+        elif data.sim_dt is not None:
+            self._sim_dt = data.sim_dt
+        else:
+            self._sim_dt = 0.05
+        self.cursor = 0
+        self._started = False
+
+        # Assign handles to recorded scene objects and collections
+        self._handles = {}
+        self._collection_handles = {}
+        for channel in data.channels:
+            if channel == STEP_CHANNEL:
+                continue
+            name, _, quantity = channel.rpartition('.')
+            if quantity in OBJECT_CHANNELS:
+                self._assign_handle(name)
+            elif quantity in COLLECTION_CHANNELS:
+                if name not in self._collection_handles:
+                    self._collection_handles[name] = \
+                        FIRST_COLLECTION_HANDLE + len(self._collection_handles)
+                for obj_name in data.collections.get(name, []):
+                    self._assign_handle(obj_name)
+        self._names = {handle: name for name, handle in self._handles.items()}
+        self._collection_names = {
+            handle: name for name, handle in self._collection_handles.items()}
+
+    def __getattr__(self, name):
+        # Constants are the same as in V-REP remote API
+        return getattr(vrepConst, name)
+
+    @property
+    def finished(self):
+        """Replay finished status."""
+        return self.cursor >= len(self._data)
+
+    @property
+    def sim_time(self):
+        """Simulation time of the current sample."""
+        return self.cursor * self._sim_dt
+
+    def simxStart(self, connectionAddress, connectionPort, waitUntilConnected,
+                  doNotReconnectOnceDisconnected, timeOutInMs,
+                  commThreadCycleInMs):
+        return self.CLIENT_ID
+
+    def simxFinish(self, clientID):
+        pass
+
+    def simxGetConnectionId(self, clientID):
+        return self.CLIENT_ID
+
+    def simxGetPingTime(self, clientID):
+        return vrepConst.simx_return_ok, 0
+
+    def simxGetLastCmdTime(self, clientID):
+        return int(round(1000 * self.sim_time))
+
+    def simxGetInMessageInfo(self, clientID, infoType):
+        if infoType == vrepConst.simx_headeroffset_server_state:
+            return 1, int(self._started)
+        if infoType == vrepConst.simx_headeroffset_scene_id:
+            return 1, self.SCENE_ID
+        if infoType == vrepConst.simx_headeroffset_server_time:
+            return 1, int(round(1000 * self.sim_time))
+        return -1, 0
+
+    def simxPauseCommunication(self, clientID, enable):
+        return vrepConst.simx_return_ok
+
+    def simxSynchronous(self, clientID, enable):
+        return vrepConst.simx_return_ok
+
+    def simxStartSimulation(self, clientID, operationMode):
+        self.cursor = 0
+        self._started = True
+        return vrepConst.simx_return_ok
+
+    def simxStopSimulation(self, clientID, operationMode):
+        self._started = False
+        return vrepConst.simx_return_ok
+
+    def simxSynchronousTrigger(self, clientID):
+        if self.finished:
+            return vrepConst.simx_return_remote_error_flag
+        self.cursor += 1
+        if self._loop and self.finished:
+            self.cursor = 0
+        return vrepConst.simx_return_ok
+
+    def simxGetBooleanParameter(self, clientID, paramIdentifier,
+                                operationMode):
+        if paramIdentifier == vrepConst.sim_boolparam_waiting_for_trigger:
+            return vrepConst.simx_return_ok, self._started
+        return vrepConst.simx_return_remote_error_flag, False
+
+    def simxGetFloatingParameter(self, clientID, paramIdentifier,
+                                 operationMode):
+        if paramIdentifier == vrepConst.sim_floatparam_simulation_time_step:
+            return vrepConst.simx_return_ok, self._sim_dt
+        return vrepConst.simx_return_remote_error_flag, 0.0
+
+    def simxGetIntegerParameter(self, clientID, paramIdentifier,
+                                operationMode):
+        return vrepConst.simx_return_remote_error_flag, 0
+
+    def simxGetStringParameter(self, clientID, paramIdentifier,
+                               operationMode):
+        if paramIdentifier == vrepConst.sim_stringparam_scene_path_and_name:
+            return vrepConst.simx_return_ok, self._data.path
+        return vrepConst.simx_return_remote_error_flag, ''
+
+    def simxGetObjectHandle(self, clientID, objectName, operationMode):
+        try:
+            return vrepConst.simx_return_ok, self._handles[objectName]
+        except KeyError:
+            return vrepConst.simx_return_remote_error_flag, 0
+
+    def simxGetCollectionHandle(self, clientID, collectionName,
+                                operationMode):
+        try:
+            return (vrepConst.simx_return_ok,
+                    self._collection_handles[collectionName])
+        except KeyError:
+            return vrepConst.simx_return_remote_error_flag, 0
+
+    def simxGetObjectPosition(self, clientID, objectHandle,
+                              relativeToObjectHandle, operationMode):
+        return self._get_vector(objectHandle, relativeToObjectHandle,
+                                'position')
+
+    def simxGetObjectOrientation(self, clientID, objectHandle,
+                                 relativeToObjectHandle, operationMode):
+        return self._get_vector(objectHandle, relativeToObjectHandle,
+                                'orientation')
+
+    def simxGetObjectGroupData(self, clientID, objectType, dataType,
+                               operationMode):
+        GROUP_DATA = {0: None, 3: 'positions', 5: 'orientations'}
+        PROXIMITY_SENSOR_DATA = 13
+
+        if (objectType == vrepConst.sim_object_proximitysensor_type
+                and dataType == PROXIMITY_SENSOR_DATA):
+            return self._get_proximity_sensor_data()
+        name = self._collection_names.get(objectType)
+        if name is None or dataType not in GROUP_DATA:
+            return vrepConst.simx_return_remote_error_flag, [], [], [], []
+        obj_names = self._data.collections.get(name, [])
+        handles = [self._handles[obj_name] for obj_name in obj_names]
+        quantity = GROUP_DATA[dataType]
+        if quantity is None:
+            return vrepConst.simx_return_ok, handles, [], [], list(obj_names)
+        sample = self._get_sample("{0}.{1}".format(name, quantity))
+        if sample is None:
+            return vrepConst.simx_return_remote_error_flag, [], [], [], []
+        return (vrepConst.simx_return_ok, handles, [], sample.ravel().tolist(),
+                [])
+
+    def simxGetObjectIntParameter(self, clientID, objectHandle, parameterID,
+                                  operationMode):
+        RESOLUTION_PARAMS = {vrepConst.sim_visionintparam_resolution_x: 1,
+                             vrepConst.sim_visionintparam_resolution_y: 0}
+
+        name = self._names.get(objectHandle)
+        if name is not None and parameterID in RESOLUTION_PARAMS:
+            for quantity in ('image', 'depth'):
+                channel = "{0}.{1}".format(name, quantity)
+                if channel in self._data:
+                    shape = self._data.get_shape(channel)
+                    return (vrepConst.simx_return_ok,
+                            shape[RESOLUTION_PARAMS[parameterID]])
+        return vrepConst.simx_return_remote_error_flag, 0
+
+    def simxReadProximitySensor(self, clientID, sensorHandle, operationMode):
+        distance = self._get_sample(
+            "{}.distance".format(self._names.get(sensorHandle)))
+        if distance is None:
+            return (vrepConst.simx_return_remote_error_flag, False, [], 0,
+                    [])
+        if np.isnan(distance):
+            return vrepConst.simx_return_ok, False, [0.0, 0.0, 0.0], 0, \
+                [0.0, 0.0, 0.0]
+        return vrepConst.simx_return_ok, True, [0.0, 0.0, float(distance)], \
+            0, [0.0, 0.0, 1.0]
+
+    def simxGetVisionSensorImage(self, clientID, sensorHandle, options,
+                                 operationMode):
+        image = self._get_sample(
+            "{}.image".format(self._names.get(sensorHandle)))
+        if image is None:
+            return vrepConst.simx_return_remote_error_flag, [], []
+        height, width = image.shape[:2]
+        if options & 1 and image.ndim == 3:
+            image = image.mean(axis=2).astype(np.uint8)
+        elif not options & 1 and image.ndim == 2:
+            image = np.repeat(image[:, :, np.newaxis], 3, axis=2)
+
+        # Arrange pixels from bottom up and represent them as signed values,
+        # as V-REP remote API does
+        image = np.ascontiguousarray(image[::-1]).view(np.int8)
+        return vrepConst.simx_return_ok, [width, height], \
+            image.ravel().tolist()
+
+    def simxGetVisionSensorDepthBuffer(self, clientID, sensorHandle,
+                                       operationMode):
+        buffer = self._get_sample(
+            "{}.depth".format(self._names.get(sensorHandle)))
+        if buffer is None:
+            return vrepConst.simx_return_remote_error_flag, [], []
+        height, width = buffer.shape
+        return vrepConst.simx_return_ok, [width, height], \
+            buffer[::-1].ravel().tolist()
+
+    def simxSetJointTargetVelocity(self, clientID, jointHandle,
+                                   targetVelocity, operationMode):
+        # Commands have no effect on recorded data
+        return vrepConst.simx_return_ok
+
+    def _assign_handle(self, name):
+        """Assign handle to scene object unless already assigned."""
+        if name not in self._handles:
+            self._handles[name] = FIRST_OBJECT_HANDLE + len(self._handles)
+
+    def _get_proximity_sensor_data(self):
+        """Retrieve current samples of distances of all recorded proximity
+        sensors as group data (states and detected points together with
+        normal vectors).
+        """
+        if self.finished:
+            return vrepConst.simx_return_remote_error_flag, [], [], [], []
+        handles = []
+        ints = []
+        floats = []
+        for handle in sorted(self._names):
+            channel = "{}.distance".format(self._names[handle])
+            if channel not in self._data:
+                continue
+            distance = self._data.get(channel, self.cursor)
+            handles.append(handle)
+            if np.isnan(distance):
+                ints.extend([0, 0])
+                floats.extend([0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+            else:
+                ints.extend([1, 0])
+                floats.extend([0.0, 0.0, float(distance), 0.0, 0.0, 1.0])
+        return vrepConst.simx_return_ok, handles, ints, floats, []
+
+    def _get_sample(self, channel):
+        """Retrieve current sample from channel, or None if the channel has
+        not been recorded.
+        """
+        if channel not in self._data or self.finished:
+            return None
+        return self._data.get(channel, self.cursor)
+
+    def _get_vector(self, handle, relative_handle, quantity):
+        """Retrieve current sample of vector quantity of scene object."""
+        if relative_handle != -1:
+            return vrepConst.simx_return_remote_error_flag, []
+        sample = self._get_sample(
+            "{0}.{1}".format(self._names.get(handle), quantity))
+        if sample is None:
+            return vrepConst.simx_return_remote_error_flag, []
+        return vrepConst.simx_return_ok, sample.tolist()
+
+
+class ReplaySimulator(Simulator):
+    """Interface to V-REP remote API server replaying data recorded from V-REP
+    simulation.
+    """
+
+    def __init__(self, path, loop=False, sim_dt=None, verbose=False):
+        self._data = ReplayData(path)
+        super(ReplaySimulator, self).__init__(
+            path, 0, verbose=verbose,
+            backend=ReplayAPI(self._data, loop, sim_dt))
+
+    @property
+    def cursor(self):
+        """Index of the current recorded sample."""
+        return self._backend.cursor
+
+    @property
+    def data(self):
+        """Data recorded from V-REP simulation."""
+        return self._data
+
+    @property
+    def finished(self):
+        """Replay finished status."""
+        return self._backend.finished
+
+    def seek(self, index):
+        """Move replay to the specified recorded sample."""
+        if not 0 <= index < len(self._data):
+            raise IndexError("Sample index out of range.")
+        self._backend.cursor = index
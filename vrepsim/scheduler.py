@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""Scheduler of V-REP simulation steps.
+
+Scheduler of V-REP simulation steps provides the following functionality:
+
+- running a function and triggering a V-REP simulation step at a fixed rate
+  of wall time, derived from V-REP simulation time step;
+- running V-REP simulation steps as fast as possible;
+- handling steps that overrun their period by either skipping missed periods
+  or catching up with them;
+- retrieving summary statistics of latency and jitter of recent steps.
+
+Each step is scheduled at a deadline computed from the start of the run rather
+than from the end of the previous step, so that delays do not accumulate. The
+scheduler sleeps until shortly before the deadline and then waits actively,
+which keeps latency low without occupying the processor for the whole period.
+"""
+
+import time
+
+import numpy as np
+
+from vrepsim.base import Communicator
+
+POLICIES = ('skip', 'catchup')
+STATISTICS = ('latency', 'jitter', 'step_time')
+
+# Clock with the highest available resolution (time.perf_counter is not
+# available on Python 2)
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class StepScheduler(Communicator):
+    """Scheduler of V-REP simulation steps.
+
+    The period of steps is V-REP simulation time step divided by real-time
+    factor, unless specified explicitly. A period of 0 runs steps as fast as
+    possible. When a step overruns its period, the 'skip' policy schedules the
+    next step at the next period that has not yet started, whereas the
+    'catchup' policy runs missed steps without waiting until the schedule is
+    met again.
+    """
+
+    def __init__(self, period=None, realtime_factor=1.0, policy='skip',
+                 spin=0.001, window=1000, vrep_sim=None):
+        super(StepScheduler, self).__init__(vrep_sim)
+        if policy not in POLICIES:
+            raise ValueError("Policy is not supported.")
+        if period is None:
+            period = self.vrep_sim.get_sim_dt() / realtime_factor
+        if period < 0:
+            raise ValueError("Period must not be negative.")
+        self._period = period
+        self._policy = policy
+        self._spin = spin
+        self._window = int(window)
+        self._stats = np.zeros((self._window, len(STATISTICS)))
+        self._n_steps = 0
+        self._n_overruns = 0
+        self._n_skipped = 0
+        self._running = False
+        self._stop = False
+
+    @property
+    def n_overruns(self):
+        """Number of steps that overran their period."""
+        return self._n_overruns
+
+    @property
+    def n_skipped(self):
+        """Number of periods skipped due to overruns."""
+        return self._n_skipped
+
+    @property
+    def n_steps(self):
+        """Number of steps run so far."""
+        return self._n_steps
+
+    @property
+    def period(self):
+        """Period of steps in seconds of wall time, or 0 if steps are run as
+        fast as possible.
+        """
+        return self._period
+
+    @property
+    def policy(self):
+        """Policy of handling steps that overrun their period."""
+        return self._policy
+
+    @property
+    def running(self):
+        """Scheduler running status."""
+        return self._running
+
+    @property
+    def stats(self):
+        """Latency, jitter and duration of recent steps, in seconds, ordered
+        from the oldest step.
+        """
+        if self._n_steps <= self._window:
+            return self._stats[:self._n_steps].copy()
+        start = self._n_steps % self._window
+        return np.roll(self._stats, -start, axis=0)
+
+    def reset(self):
+        """Discard statistics of steps."""
+        self._n_steps = 0
+        self._n_overruns = 0
+        self._n_skipped = 0
+
+    def run(self, func=None, n_steps=None, duration=None):
+        """Run steps, each calling the specified function with the number of
+        the step and then triggering a V-REP simulation step, until the
+        specified number of steps has been run, the specified wall time has
+        elapsed, the function returns False or the scheduler is stopped.
+        """
+        if self._running:
+            raise RuntimeError("Could not run scheduler: scheduler already "
+                               "running.")
+        vrep_sim = self.vrep_sim
+        period = self._period
+        self._running = True
+        self._stop = False
+        try:
+            step = 0
+            start = _clock()
+            deadline = start
+            prev_step_start = None
+            while not self._stop:
+                if n_steps is not None and step >= n_steps:
+                    break
+                if duration is not None and deadline - start >= duration:
+                    break
+
+                # Wait until the deadline of the step
+                if period:
+                    remaining = deadline - _clock()
+                    if remaining > self._spin:
+                        time.sleep(remaining - self._spin)
+                    while _clock() < deadline:
+                        pass
+                step_start = _clock()
+
+                # Run the step
+                if func is not None and func(step) is False:
+                    self._stop = True
+                vrep_sim.trig_sim_step()
+                step_end = _clock()
+
+                # Record statistics of the step
+                latency = step_start - deadline if period else 0.0
+                if prev_step_start is not None:
+                    jitter = abs(step_start - prev_step_start - period)
+                else:
+                    jitter = 0.0
+                self._stats[self._n_steps % self._window] = (
+                    latency, jitter, step_end - step_start)
+                self._n_steps += 1
+                prev_step_start = step_start
+                step += 1
+
+                # Schedule the next step, handling overrun if necessary
+                deadline += period
+                if period and step_end > deadline:
+                    self._n_overruns += 1
+                    if self._policy == 'skip':
+                        n_missed = int((step_end - deadline) // period) + 1
+                        self._n_skipped += n_missed
+                        deadline += n_missed * period
+                        prev_step_start = None
+                if not period:
+                    deadline = step_end
+        finally:
+            self._running = False
+
+    def stop(self):
+        """Stop running steps after the current step."""
+        self._stop = True
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """Retrieve summary statistics of latency, jitter and duration of
+        recent steps.
+        """
+        stats = self.stats
+        summary = {'n_steps': len(stats), 'n_overruns': self._n_overruns,
+                   'n_skipped': self._n_skipped}
+        for s, statistic in enumerate(STATISTICS):
+            if len(stats):
+                values = {'mean': float(stats[:, s].mean()),
+                          'max': float(stats[:, s].max())}
+                for p, value in zip(percentiles,
+                                    np.percentile(stats[:, s], percentiles)):
+                    values['p{}'.format(p)] = float(value)
+            else:
+                values = {}
+            summary[statistic] = values
+        return summary
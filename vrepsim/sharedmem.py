@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""Sharing of data from V-REP simulations with local processes.
+
+Sharing of data from V-REP simulations with local processes provides a
+publisher of data, which provides the following functionality:
+
+- adding channels of data, optionally retrieved from scene objects simulated
+  in V-REP on each V-REP simulation step;
+- publishing the latest data in shared memory.
+
+It also provides a reader of published data, which provides the following
+functionality:
+
+- retrieving the latest data without copying;
+- retrieving a consistent copy of the latest data;
+- checking whether data have been published since they were retrieved.
+
+Each channel of data is stored in a separate shared memory segment, starting
+with a header holding a version counter and a timestamp. The version counter
+implements a sequence lock: it is odd while data are being written and it is
+incremented by two with each publication. Readers therefore never block the
+publisher; instead, they verify that the version counter has not changed while
+they were reading, retrying with exponential backoff until a timeout expires.
+Since data are retrieved once by the publishing process, any number of local
+processes may read them without additional load on V-REP remote API server.
+"""
+
+import json
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+HEADER_SIZE = 16  # version counter (uint64) and timestamp (float64)
+MANIFEST_SIZE = 65536
+MIN_BACKOFF = 1e-5  # delay before the first retry (s)
+MAX_BACKOFF = 1e-3  # maximum delay between retries (s)
+
+_register_lock = threading.Lock()
+
+
+def _attach_shared_memory(name):
+    """Attach to existing shared memory segment without taking
+    responsibility for removing it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13, keep resource tracker from registering the segment,
+    # which would remove it when the reading process exits
+    with _register_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _backoff(delay, deadline, message):
+    """Wait before retrying to read data being written, returning delay
+    before the next retry, or raise TimeoutError if the deadline has passed.
+    """
+    if time.time() > deadline:
+        raise TimeoutError(message)
+    time.sleep(delay)
+    return min(2 * delay, MAX_BACKOFF)
+
+
+class _Channel(object):
+    """Channel of data stored in shared memory segment."""
+
+    def __init__(self, segment, shape, dtype):
+        self.segment = segment
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.header = np.ndarray((2,), np.uint64, segment.buf)
+        self.stamp = np.ndarray((1,), np.float64, segment.buf, 8)
+        self.data = np.ndarray(self.shape, self.dtype, segment.buf,
+                               HEADER_SIZE)
+
+    def release(self):
+        """Release views of shared memory segment."""
+        self.header = self.stamp = self.data = None
+
+
+class FramePublisher(object):
+    """Publisher of data from V-REP simulations in shared memory."""
+
+    def __init__(self, prefix):
+        self._prefix = prefix
+        self._channels = {}
+        self._sources = []
+        self._vrep_sim = None
+        self._manifest = shared_memory.SharedMemory(
+            name=prefix, create=True, size=MANIFEST_SIZE)
+        self._write_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def channels(self):
+        """Names of channels."""
+        return list(self._channels)
+
+    @property
+    def prefix(self):
+        """Prefix of names of shared memory segments."""
+        return self._prefix
+
+    def add_channel(self, name, shape, dtype=np.float64, source=None):
+        """Add channel of data, optionally retrieved on each V-REP simulation
+        step by calling the specified function.
+        """
+        if name in self._channels:
+            raise ValueError("Could not add channel {}: channel already "
+                             "added.".format(name))
+        dtype = np.dtype(dtype)
+        size = HEADER_SIZE + int(np.prod(shape)) * dtype.itemsize
+        segment = shared_memory.SharedMemory(
+            name="{0}.{1}".format(self._prefix, name), create=True, size=size)
+        channel = _Channel(segment, shape, dtype)
+        channel.header[:] = 0
+        self._channels[name] = channel
+        if source is not None:
+            self._sources.append((name, source))
+        self._write_manifest()
+
+    def add_distances(self, sensor_array, name=None, fast=True):
+        """Add channel of distances to the detected points retrieved from all
+        sensors in array of proximity sensors on each V-REP simulation step,
+        with missing detections stored as NaN.
+        """
+        def get_distances():
+            return [distance if distance is not None else np.nan
+                    for distance in sensor_array.get_distances(fast=fast)]
+
+        if name is None:
+            name = "{}.distances".format(sensor_array[0].name)
+        self.add_channel(name, (len(sensor_array),), np.float64,
+                         get_distances)
+
+    def add_image(self, sensor, grayscale=False, name=None):
+        """Add channel of images retrieved from vision sensor on each V-REP
+        simulation step.
+        """
+        resolution_x, resolution_y = sensor.get_resolution()
+        if grayscale:
+            shape = (resolution_y, resolution_x)
+        else:
+            shape = (resolution_y, resolution_x, 3)
+        if name is None:
+            name = "{}.image".format(sensor.name)
+        self.add_channel(
+            name, shape, np.uint8,
+            lambda: sensor.get_image(grayscale=grayscale, as_array=True))
+
+    def attach(self, vrep_sim):
+        """Attach publisher to interface to V-REP remote API server so that
+        data from channels with functions retrieving them are published
+        before triggering each V-REP simulation step.
+        """
+        if self._vrep_sim is not None:
+            raise RuntimeError("Could not attach publisher: publisher already "
+                               "attached.")
+        vrep_sim.add_step_hook(self.publish_sources)
+        self._vrep_sim = vrep_sim
+
+    def close(self):
+        """Stop publishing and remove shared memory segments."""
+        if self._vrep_sim is not None:
+            self.detach()
+        for channel in self._channels.values():
+            channel.release()
+            channel.segment.close()
+            channel.segment.unlink()
+        self._channels = {}
+        self._sources = []
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest.unlink()
+            self._manifest = None
+
+    def detach(self):
+        """Detach publisher from interface to V-REP remote API server."""
+        if self._vrep_sim is None:
+            raise RuntimeError("Could not detach publisher: publisher not "
+                               "attached.")
+        self._vrep_sim.remove_step_hook(self.publish_sources)
+        self._vrep_sim = None
+
+    def publish(self, name, data, stamp=None):
+        """Publish data in channel."""
+        try:
+            channel = self._channels[name]
+        except KeyError:
+            raise ValueError("Could not publish data in channel {}: channel "
+                             "not added.".format(name))
+        if stamp is None:
+            stamp = time.time()
+        header = channel.header
+        header[0] += 1
+        try:
+            channel.data[...] = data
+            channel.stamp[0] = stamp
+        finally:
+            header[0] += 1
+
+    def publish_sources(self):
+        """Publish data retrieved from all channels with functions retrieving
+        them.
+        """
+        for name, source in self._sources:
+            self.publish(name, source())
+
+    def _write_manifest(self):
+        """Write description of channels to shared memory."""
+        manifest = json.dumps({
+            name: {'shape': list(channel.shape), 'dtype': channel.dtype.str}
+            for name, channel in self._channels.items()}).encode('utf-8')
+        if len(manifest) + HEADER_SIZE > MANIFEST_SIZE:
+            raise ValueError("Could not describe channels: too many "
+                             "channels.")
+        header = np.ndarray((2,), np.uint64, self._manifest.buf)
+        header[0] += 1
+        header[1] = len(manifest)
+        self._manifest.buf[HEADER_SIZE:HEADER_SIZE+len(manifest)] = manifest
+        header[0] += 1
+
+
+class FrameReader(object):
+    """Reader of data from V-REP simulations published in shared memory."""
+
+    def __init__(self, prefix):
+        self._prefix = prefix
+        self._channels = {}
+        self._manifest = _attach_shared_memory(prefix)
+        self._manifest_version = None
+        self._descriptions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def channels(self):
+        """Names of channels."""
+        self._read_manifest()
+        return list(self._descriptions)
+
+    def close(self):
+        """Stop reading published data."""
+        for channel in self._channels.values():
+            channel.release()
+            channel.segment.close()
+        self._channels = {}
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
+
+    def get_version(self, name):
+        """Retrieve number of publications of data in channel."""
+        return int(self._get_channel(name).header[0]) // 2
+
+    def is_current(self, name, version):
+        """Check if no data have been published in channel since the
+        specified version was retrieved.
+        """
+        return int(self._get_channel(name).header[0]) == 2 * version
+
+    def read(self, name, out=None, timeout=1.0):
+        """Retrieve consistent copy of the latest data in channel, together
+        with its version and timestamp.
+        """
+        channel = self._get_channel(name)
+        if out is None:
+            out = np.empty(channel.shape, channel.dtype)
+        deadline = time.time() + timeout
+        delay = MIN_BACKOFF
+        while True:
+            seq = int(channel.header[0])
+            if not seq % 2:
+                out[...] = channel.data
+                stamp = float(channel.stamp[0])
+                if int(channel.header[0]) == seq:
+                    return out, seq // 2, stamp
+            delay = _backoff(delay, deadline, "Could not read data from "
+                             "channel {}: timeout.".format(name))
+
+    def view(self, name, timeout=1.0):
+        """Retrieve the latest data in channel without copying, together with
+        its version; the data remain valid as long as the version is current.
+        """
+        channel = self._get_channel(name)
+        deadline = time.time() + timeout
+        delay = MIN_BACKOFF
+        while True:
+            seq = int(channel.header[0])
+            if not seq % 2:
+                return channel.data, seq // 2
+            delay = _backoff(delay, deadline, "Could not view data in "
+                             "channel {}: timeout.".format(name))
+
+    def _get_channel(self, name):
+        """Retrieve channel, attaching to its shared memory segment if
+        necessary.
+        """
+        try:
+            return self._channels[name]
+        except KeyError:
+            pass
+        self._read_manifest()
+        try:
+            description = self._descriptions[name]
+        except KeyError:
+            raise ValueError("Could not read data from channel {}: channel "
+                             "not published.".format(name))
+        segment = _attach_shared_memory("{0}.{1}".format(self._prefix, name))
+        channel = _Channel(segment, description['shape'],
+                           description['dtype'])
+        self._channels[name] = channel
+        return channel
+
+    def _read_manifest(self, timeout=1.0):
+        """Read description of channels from shared memory if changed."""
+        header = np.ndarray((2,), np.uint64, self._manifest.buf)
+        deadline = time.time() + timeout
+        delay = MIN_BACKOFF
+        while True:
+            seq = int(header[0])
+            if seq == self._manifest_version:
+                return
+            if not seq % 2:
+                size = int(header[1])
+                manifest = bytes(
+                    self._manifest.buf[HEADER_SIZE:HEADER_SIZE+size])
+                if int(header[0]) == seq:
+                    break
+            delay = _backoff(delay, deadline, "Could not read description "
+                             "of channels: timeout.")
+        self._descriptions = json.loads(manifest.decode('utf-8'))
+        self._manifest_version = seq
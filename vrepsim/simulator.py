@@ -8,22 +8,33 @@ Interface to V-REP remote API server provides the following functionality:
 - retrieving default interface to V-REP remote API server;
 - retrieving V-REP version;
 - retrieving dynamics engine name;
+- pausing communication with a V-REP remote API server;
+- retrieving ping time;
 - loading scene from file;
-- retrieving scene path;
+- retrieving scene path and scene identity;
 - starting a V-REP simulation in synchronous operation mode;
 - stopping a V-REP simulation;
 - retrieving whether V-REP simulation is started;
 - triggering a V-REP simulation step;
+- running V-REP simulation steps at a fixed rate of wall time;
+- adding and removing functions called on each V-REP simulation step;
+- starting, reading and stopping data streamed from V-REP;
+- restoring data streamed from V-REP after reconnecting to the same scene;
+- reading data by multiple V-REP remote API functions together;
+- starting and stopping dispatching V-REP remote API calls issued from
+  multiple threads;
 - retrieving V-REP simulation time step;
-- retrieving dynamics engine time step.
+- retrieving dynamics engine time step;
+- capturing snapshot of the state of scene objects.
 """
 
 from __future__ import print_function
 
+import contextlib
+import threading
 import time
 
-import vrep
-
+from vrepsim.backend import detach_wrappers, set_backend, vrep
 from vrepsim.exceptions import ConnectionError, ServerError
 
 _vrep_sim = None
@@ -41,7 +52,7 @@ class Simulator(object):
     """Interface to V-REP remote API server."""
 
     def __init__(self, addr, port, wait=True, reconnect=False, timeout=5000,
-                 cycle=5, verbose=False):
+                 cycle=5, verbose=False, backend=None, handle_cache=None):
         self._addr = addr
         self._port = port
         self._wait = wait
@@ -49,7 +60,18 @@ class Simulator(object):
         self._timeout = timeout
         self._cycle = cycle
         self.verbose = verbose
+        self._backend = backend
+        self._handle_cache = handle_cache
         self._client_id = None
+        self._comm_pause_depth = 0
+        self._comm_pause_lock = threading.Lock()
+        self._dispatcher = None
+        self._pre_step_hooks = []
+        self._post_step_hooks = []
+        self._streams = set()
+        self._scene_id = None
+        self._scene_path = None
+        self._connection_id = None
 
     def __del__(self):
         # If connected to V-REP remote API server, disconnect, but without
@@ -71,6 +93,13 @@ class Simulator(object):
         """V-REP remote API server address."""
         return self._addr
 
+    @property
+    def backend(self):
+        """Backend providing V-REP remote API, or None if the default backend
+        is used.
+        """
+        return self._backend
+
     @property
     def client_id(self):
         """Client ID."""
@@ -86,6 +115,20 @@ class Simulator(object):
         """Interval between data exchanges with V-REP."""
         return self._cycle
 
+    @property
+    def dispatcher(self):
+        """Dispatcher of V-REP remote API calls issued from multiple threads,
+        or None if not started.
+        """
+        return self._dispatcher
+
+    @property
+    def handle_cache(self):
+        """Cache of handles to scene objects and collections, or None if
+        handles are not cached.
+        """
+        return self._handle_cache
+
     @property
     def port(self):
         """V-REP remote API server port."""
@@ -95,9 +138,27 @@ class Simulator(object):
     def reconnect(self):
         """Automatic attempts to reconnect to V-REP remote API server after
         losing connection.
+
+        Reestablished connection is detected when triggering the next V-REP
+        simulation step or when checking connection explicitly.
         """
         return self._reconnect
 
+    @property
+    def scene_id(self):
+        """Identity of the scene simulated in V-REP when last connected, or
+        None if not connected yet.
+        """
+        return self._scene_id
+
+    @property
+    def streams(self):
+        """Data streamed from V-REP, each described by the name of V-REP
+        remote API function and the arguments (following client ID) it is
+        called with.
+        """
+        return frozenset(self._streams)
+
     @property
     def timeout(self):
         """Timeout for establishing connection with V-REP remote API server or
@@ -112,8 +173,42 @@ class Simulator(object):
         """
         return self._wait
 
-    def connect(self, verbose=None):
-        """Connect to V-REP remote API server."""
+    def add_step_hook(self, hook, after=False):
+        """Add function called before (or, optionally, after) triggering
+        each V-REP simulation step.
+        """
+        if after:
+            self._post_step_hooks.append(hook)
+        else:
+            self._pre_step_hooks.append(hook)
+
+    def check_connection(self):
+        """Check whether connection to V-REP remote API server has been
+        reestablished automatically since last checked, returning whether it
+        has.
+
+        If it has, data streamed from V-REP before are restored (if connected
+        to the same scene as before) and cached handles are required to be
+        validated, as when reconnecting.
+        """
+        if self._client_id is None:
+            raise ConnectionError("Could not check connection: not connected "
+                                  "to V-REP remote API server.")
+        connection_id = vrep.simxGetConnectionId(self._client_id)
+        if connection_id in (-1, self._connection_id):
+            return False
+        self._connection_id = connection_id
+        self._rearm()
+        return True
+
+    def connect(self, verbose=None, warm=True):
+        """Connect to V-REP remote API server.
+
+        If reconnecting to the same scene (with the same identity and path),
+        data streamed from V-REP before are, by default, restored together
+        using a single data exchange with V-REP. Cached handles are kept, but
+        they are validated again (by checking a few of them) when first used.
+        """
         global _vrep_sim
 
         # If necessary, determine whether messages should be displayed
@@ -132,7 +227,9 @@ class Simulator(object):
                     "another connection to V-REP remote API server already "
                     "established.".format(self._addr, self._port))
 
-        # Just in case, close all opened connections to V-REP
+        # Just in case, close all opened connections to V-REP using the
+        # backend of this interface
+        set_backend(self._backend)
         vrep.simxFinish(-1)
         self._client_id = None
         _vrep_sim = None
@@ -142,12 +239,20 @@ class Simulator(object):
             self._addr, self._port, self._wait, not self._reconnect,
             self._timeout, self._cycle)
         if client_id == -1:
+            detach_wrappers()
+            set_backend()
             raise ConnectionError(
                 "Failed to connect to V-REP remote API server at "
                 "{0}:{1}.".format(self._addr, self._port))
         self._client_id = client_id
+        self._connection_id = vrep.simxGetConnectionId(client_id)
+        self._comm_pause_depth = 0
         _vrep_sim = self
 
+        # If connected to the same scene as before, restore data streamed
+        # from V-REP, and require cached handles to be validated
+        self._rearm(warm)
+
         # If necessary, display confirmation message
         if verbose:
             print("Successfully {0} to V-REP remote API server at "
@@ -163,10 +268,19 @@ class Simulator(object):
 
         # If connected to V-REP, disconnect
         if self._client_id is not None:
+            # Detach wrappers of the backend (e.g., stop dispatching calls)
+            detach_wrappers()
+
+            # If necessary, store cached handles
+            if self._handle_cache is not None:
+                self._handle_cache.save()
+
             # Disconnect from V-REP
             vrep.simxFinish(self._client_id)
             self._client_id = None
+            self._streams = set()
             _vrep_sim = None
+            set_backend()
 
             # If necessary, display confirmation message
             if verbose:
@@ -214,6 +328,32 @@ class Simulator(object):
             raise ServerError("Could not retrieve dynamics engine name.")
         return dyn_engs_names[dyn_eng_id]
 
+    def get_ping_time(self):
+        """Retrieve ping time in milliseconds.
+
+        Since the ping is answered only after all previously sent commands are
+        processed, retrieving ping time also ensures that replies to these
+        commands have been received.
+        """
+        if self._client_id is None:
+            raise ConnectionError("Could not retrieve ping time: not "
+                                  "connected to V-REP remote API server.")
+        res, ping_time = vrep.simxGetPingTime(self._client_id)
+        if res != vrep.simx_return_ok:
+            raise ServerError("Could not retrieve ping time.")
+        return ping_time
+
+    def get_scene_id(self):
+        """Retrieve identity of the scene simulated in V-REP, which changes
+        whenever a different scene is loaded.
+        """
+        self.get_ping_time()
+        res, scene_id = vrep.simxGetInMessageInfo(
+            self._client_id, vrep.simx_headeroffset_scene_id)
+        if res == -1:
+            raise ServerError("Could not retrieve scene identity.")
+        return scene_id
+
     def get_scene_path(self):
         """Retrieve scene path."""
         if self._client_id is None:
@@ -314,6 +454,173 @@ class Simulator(object):
             raise ServerError("Could not load scene from file {}."
                               "".format(filename))
 
+    @contextlib.contextmanager
+    def pause_comm(self):
+        """Pause communication with V-REP remote API server so that commands
+        issued in non-blocking mode in the meantime are sent together.
+
+        Pausing communication can be nested, in which case communication is
+        resumed only when leaving the outermost context.
+        """
+        if self._client_id is None:
+            raise ConnectionError(
+                "Could not pause communication with V-REP remote API server: "
+                "not connected to V-REP remote API server.")
+        with self._comm_pause_lock:
+            if not self._comm_pause_depth:
+                res = vrep.simxPauseCommunication(self._client_id, True)
+                if res != vrep.simx_return_ok:
+                    raise ServerError("Could not pause communication with "
+                                      "V-REP remote API server.")
+            self._comm_pause_depth += 1
+        try:
+            yield
+        except BaseException:
+            # Resume communication without masking the exception raised
+            # while communication was paused
+            self._resume_comm(check=False)
+            raise
+        else:
+            self._resume_comm()
+
+    def read_batch(self, calls, streaming=False):
+        """Read data by multiple V-REP remote API functions, each specified
+        by its name and the arguments (following client ID) it is called with,
+        optionally from data streamed from V-REP, returning the results of the
+        functions.
+
+        Data are requested by all functions using a single data exchange with
+        V-REP. When streaming, streaming is started for all functions together
+        if necessary, and data are then read from data already received.
+        """
+        if self._client_id is None:
+            raise ConnectionError("Could not read data: not connected to "
+                                  "V-REP remote API server.")
+        calls = [(funcname, tuple(args)) for funcname, args in calls]
+        if streaming:
+            if any((funcname,) + args not in self._streams
+                   for funcname, args in calls):
+                with self.pause_comm():
+                    for funcname, args in calls:
+                        self.start_stream(funcname, *args)
+                self.get_ping_time()
+        else:
+            with self.pause_comm():
+                for funcname, args in calls:
+                    getattr(vrep, funcname)(
+                        *((self._client_id,) + args
+                          + (vrep.simx_opmode_oneshot,)))
+            self.get_ping_time()
+        results = []
+        for funcname, args in calls:
+            results.append(getattr(vrep, funcname)(
+                *((self._client_id,) + args + (vrep.simx_opmode_buffer,))))
+        return results
+
+    def read_stream(self, funcname, *args):
+        """Read data streamed from V-REP by V-REP remote API function called
+        with the specified arguments (following client ID), returning the
+        result of the function.
+
+        If streaming has not been started yet, it is started and the first
+        data are awaited.
+        """
+        if self.start_stream(funcname, *args):
+            self.get_ping_time()
+        return getattr(vrep, funcname)(
+            *((self._client_id,) + args + (vrep.simx_opmode_buffer,)))
+
+    def remove_step_hook(self, hook):
+        """Remove function called on each V-REP simulation step."""
+        if hook in self._pre_step_hooks:
+            self._pre_step_hooks.remove(hook)
+        elif hook in self._post_step_hooks:
+            self._post_step_hooks.remove(hook)
+        else:
+            raise ValueError("Could not remove step hook: hook not added.")
+
+    def restore_streams(self):
+        """Start again streaming data from V-REP for all data streamed before,
+        e.g., after the connection has been reestablished, together using a
+        single data exchange with V-REP, returning the number of restored
+        streams.
+        """
+        if self._client_id is None:
+            raise ConnectionError("Could not restore streaming data: not "
+                                  "connected to V-REP remote API server.")
+        results = []
+        with self.pause_comm():
+            for stream in self._streams:
+                res = getattr(vrep, stream[0])(
+                    *((self._client_id,) + stream[1:]
+                      + (vrep.simx_opmode_streaming,)))
+                results.append(res[0] if isinstance(res, tuple) else res)
+        if any(res not in (vrep.simx_return_ok, vrep.simx_return_novalue_flag)
+               for res in results):
+            raise ServerError("Could not restore streaming data.")
+        self.get_ping_time()
+        return len(results)
+
+    def run_steps(self, func=None, n_steps=None, duration=None, period=None,
+                  realtime_factor=1.0, policy='skip'):
+        """Run V-REP simulation steps at a fixed rate of wall time (or, if
+        period is 0, as fast as possible), calling the specified function
+        with the number of the step before triggering each step, and return
+        the scheduler of steps, which holds their statistics.
+        """
+        from vrepsim.scheduler import StepScheduler
+
+        scheduler = StepScheduler(period, realtime_factor, policy,
+                                  vrep_sim=self)
+        scheduler.run(func, n_steps, duration)
+        return scheduler
+
+    def snapshot(self, objects=None, float_params=()):
+        """Capture snapshot of the state of scene objects."""
+        from vrepsim.snapshot import SceneSnapshot
+
+        scene_snapshot = SceneSnapshot(objects, float_params, self)
+        scene_snapshot.capture()
+        return scene_snapshot
+
+    def start_dispatcher(self, window=0.001):
+        """Start dispatching V-REP remote API calls issued from multiple
+        threads through a single dispatching thread.
+        """
+        from vrepsim.dispatcher import Dispatcher
+
+        if self._dispatcher is not None:
+            raise RuntimeError("Could not start dispatcher: dispatcher "
+                               "already started.")
+        if self._client_id is None:
+            raise ConnectionError("Could not start dispatcher: not connected "
+                                  "to V-REP remote API server.")
+        dispatcher = Dispatcher(self, window)
+        dispatcher.start()
+        self._dispatcher = dispatcher
+
+    def start_stream(self, funcname, *args):
+        """Start streaming data from V-REP by V-REP remote API function
+        called with the specified arguments (following client ID), unless
+        already started, returning whether streaming has been started.
+        """
+        if self._client_id is None:
+            raise ConnectionError(
+                "Could not start streaming data by {}: not connected to V-REP "
+                "remote API server.".format(funcname))
+        stream = (funcname,) + args
+        if stream in self._streams:
+            return False
+        res = getattr(vrep, funcname)(
+            *((self._client_id,) + args + (vrep.simx_opmode_streaming,)))
+        if isinstance(res, tuple):
+            res = res[0]
+        if res not in (vrep.simx_return_ok, vrep.simx_return_novalue_flag):
+            raise ServerError(
+                "Could not start streaming data by {}.".format(funcname))
+        self._streams.add(stream)
+        return True
+
     def start_sim(self, verbose=None):
         """Start V-REP simulation in synchronous operation mode."""
         # If necessary, determine whether messages should be displayed
@@ -338,6 +645,33 @@ class Simulator(object):
             print("V-REP simulation started at "
                   "{}.".format(time.strftime("%H:%M:%S")))
 
+    def stop_dispatcher(self):
+        """Stop dispatching V-REP remote API calls issued from multiple
+        threads.
+        """
+        if self._dispatcher is None:
+            raise RuntimeError("Could not stop dispatcher: dispatcher not "
+                               "started.")
+        self._dispatcher.stop()
+        self._dispatcher = None
+
+    def stop_stream(self, funcname, *args):
+        """Stop streaming data from V-REP by V-REP remote API function
+        called with the specified arguments (following client ID).
+        """
+        stream = (funcname,) + args
+        if stream not in self._streams:
+            raise ValueError("Could not stop streaming data by {}: streaming "
+                             "not started.".format(funcname))
+        res = getattr(vrep, funcname)(
+            *((self._client_id,) + args + (vrep.simx_opmode_discontinue,)))
+        if isinstance(res, tuple):
+            res = res[0]
+        if res not in (vrep.simx_return_ok, vrep.simx_return_novalue_flag):
+            raise ServerError(
+                "Could not stop streaming data by {}.".format(funcname))
+        self._streams.discard(stream)
+
     def stop_sim(self, verbose=None):
         """Stop V-REP simulation."""
         # If necessary, determine whether messages should be displayed
@@ -363,6 +697,38 @@ class Simulator(object):
         if self._client_id is None:
             raise ConnectionError("Could not trigger V-REP simulation step: "
                                   "not connected to V-REP remote API server.")
+        self.check_connection()
+        for hook in self._pre_step_hooks:
+            hook()
         res = vrep.simxSynchronousTrigger(self._client_id)
         if res != vrep.simx_return_ok:
             raise ServerError("Could not trigger V-REP simulation step.")
+        for hook in self._post_step_hooks:
+            hook()
+
+    def _rearm(self, warm=True):
+        """Restore data streamed from V-REP before (unless not warm) if
+        connected to the same scene as before, and require cached handles to
+        be validated.
+        """
+        scene = (self.get_scene_id(), self.get_scene_path())
+        if warm and scene == (self._scene_id, self._scene_path):
+            if self._streams:
+                self.restore_streams()
+        else:
+            self._streams = set()
+        if self._handle_cache is not None:
+            self._handle_cache.invalidate()
+        self._scene_id, self._scene_path = scene
+
+    def _resume_comm(self, check=True):
+        """Leave context pausing communication with V-REP remote API server,
+        resuming communication when leaving the outermost context.
+        """
+        with self._comm_pause_lock:
+            self._comm_pause_depth -= 1
+            if not self._comm_pause_depth and self._client_id is not None:
+                res = vrep.simxPauseCommunication(self._client_id, False)
+                if check and res != vrep.simx_return_ok:
+                    raise ServerError("Could not resume communication with "
+                                      "V-REP remote API server.")
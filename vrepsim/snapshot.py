@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Snapshot of the state of scene objects simulated in V-REP.
+
+Snapshot of the state of scene objects simulated in V-REP provides the
+following functionality:
+
+- capturing parents, poses, joint positions and float parameters of scene
+  objects;
+- restoring the captured state of scene objects.
+
+The state of all scene objects is captured using a few data exchanges with
+V-REP regardless of the number of scene objects, and it is restored using a
+single data exchange, so that resetting a scene does not require reloading it.
+Since the handles to scene objects remain unchanged, existing interfaces to
+scene objects remain valid after the state is restored.
+"""
+
+from vrepsim.backend import vrep
+from vrepsim.base import Communicator
+from vrepsim.exceptions import ConnectionError, ServerError
+from vrepsim.objects import SceneObject, to_handle
+
+
+class SceneSnapshot(Communicator):
+    """Snapshot of the state of scene objects simulated in V-REP."""
+
+    def __init__(self, objects=None, float_params=(), vrep_sim=None):
+        super(SceneSnapshot, self).__init__(vrep_sim)
+        if objects is not None:
+            self._objects = list(objects)
+            self._handles = set(to_handle(obj, "object")
+                                for obj in self._objects)
+        else:
+            self._objects = []
+            self._handles = None
+        self._float_params = tuple(float_params)
+        self._parents = None
+        self._poses = None
+        self._joint_positions = None
+        self._param_values = None
+        self._wrapper_parents = None
+
+    @property
+    def captured(self):
+        """Snapshot captured status."""
+        return self._poses is not None
+
+    @property
+    def handles(self):
+        """Handles to scene objects whose state is captured."""
+        if self._poses is None:
+            return None
+        return sorted(self._poses)
+
+    def capture(self):
+        """Capture the state of scene objects."""
+        GROUP_PARENTS = 2
+        GROUP_LOCAL_POSES = 10
+        GROUP_JOINT_STATES = 15
+
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not capture snapshot: not connected to V-REP remote "
+                "API server.")
+
+        # Retrieve parents and poses relative to parents of all scene objects
+        res, handles, parents, _, _ = vrep.simxGetObjectGroupData(
+            client_id, vrep.sim_appobj_object_type, GROUP_PARENTS,
+            vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError("Could not capture snapshot: could not retrieve "
+                              "parents of scene objects.")
+        res, pose_handles, _, poses, _ = vrep.simxGetObjectGroupData(
+            client_id, vrep.sim_appobj_object_type, GROUP_LOCAL_POSES,
+            vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError("Could not capture snapshot: could not retrieve "
+                              "poses of scene objects.")
+        if list(pose_handles) != list(handles):
+            raise ServerError("Could not capture snapshot: scene changed "
+                              "while capturing.")
+
+        # Retrieve positions of all joints
+        res, joint_handles, _, joint_states, _ = vrep.simxGetObjectGroupData(
+            client_id, vrep.sim_object_joint_type, GROUP_JOINT_STATES,
+            vrep.simx_opmode_blocking)
+        if res != vrep.simx_return_ok:
+            raise ServerError("Could not capture snapshot: could not retrieve "
+                              "positions of joints.")
+
+        # Keep the state of selected scene objects only
+        self._parents = {}
+        self._poses = {}
+        for h, handle in enumerate(handles):
+            if self._handles is None or handle in self._handles:
+                self._parents[handle] = parents[h]
+                self._poses[handle] = poses[6*h:6*h+6]
+        self._joint_positions = {}
+        for j, handle in enumerate(joint_handles):
+            if handle in self._poses:
+                self._joint_positions[handle] = joint_states[2*j]
+
+        # Retrieve float parameters of selected scene objects, requesting all
+        # of them at once and reading the replies once they have arrived;
+        # parameters not applicable to a given scene object are skipped
+        self._param_values = {}
+        if self._float_params:
+            with self.vrep_sim.pause_comm():
+                for handle in self._poses:
+                    for param in self._float_params:
+                        vrep.simxGetObjectFloatParameter(
+                            client_id, handle, param, vrep.simx_opmode_oneshot)
+            self.vrep_sim.get_ping_time()
+            for handle in self._poses:
+                for param in self._float_params:
+                    res, value = vrep.simxGetObjectFloatParameter(
+                        client_id, handle, param, vrep.simx_opmode_buffer)
+                    if res == vrep.simx_return_ok:
+                        self._param_values[(handle, param)] = value
+
+        # Remember relationships between interfaces to scene objects
+        self._wrapper_parents = [(obj, obj._parent) for obj in self._objects
+                                 if isinstance(obj, SceneObject)]
+
+    def restore(self):
+        """Restore the captured state of scene objects."""
+        if self._poses is None:
+            raise RuntimeError("Could not restore snapshot: snapshot not "
+                               "captured.")
+        client_id = self.client_id
+        if client_id is None:
+            raise ConnectionError(
+                "Could not restore snapshot: not connected to V-REP remote "
+                "API server.")
+
+        # Send all commands together so that V-REP applies them at once
+        results = []
+        with self.vrep_sim.pause_comm():
+            for handle, parent in self._parents.items():
+                results.append(vrep.simxSetObjectParent(
+                    client_id, handle, parent, True, vrep.simx_opmode_oneshot))
+            for handle, pose in self._poses.items():
+                results.append(vrep.simxSetObjectPosition(
+                    client_id, handle, vrep.sim_handle_parent, pose[:3],
+                    vrep.simx_opmode_oneshot))
+                results.append(vrep.simxSetObjectOrientation(
+                    client_id, handle, vrep.sim_handle_parent, pose[3:],
+                    vrep.simx_opmode_oneshot))
+            for handle, position in self._joint_positions.items():
+                results.append(vrep.simxSetJointPosition(
+                    client_id, handle, position, vrep.simx_opmode_oneshot))
+            for (handle, param), value in self._param_values.items():
+                results.append(vrep.simxSetObjectFloatParameter(
+                    client_id, handle, param, value,
+                    vrep.simx_opmode_oneshot))
+        for res in results:
+            if res not in (vrep.simx_return_ok, vrep.simx_return_novalue_flag):
+                raise ServerError("Could not restore snapshot.")
+
+        # Restore relationships between interfaces to scene objects
+        for obj, parent in self._wrapper_parents:
+            if obj._parent is parent:
+                continue
+            if obj._parent is not None:
+                obj._parent.unregister_child(obj)
+            if parent is not None:
+                parent.register_child(obj)
+            obj._parent = parent
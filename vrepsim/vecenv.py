@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""Vectorized environments simulated in V-REP.
+
+Vectorized environments simulated in V-REP provide the following
+functionality:
+
+- running episodes of Pioneer P3-DX robot in a scene simulated in V-REP, with
+  observations built from its proximity sensors and, optionally, a vision
+  sensor, and actions setting velocities of its wheels;
+- running multiple environments in worker processes, each connected to its own
+  V-REP remote API server;
+- stepping all environments concurrently and stacking their observations,
+  rewards and episode finished statuses into NumPy arrays;
+- resetting environments whose episodes have finished automatically within
+  their worker processes.
+
+Environments follow the interface of OpenAI Gym environments (reset, step and
+close), without requiring Gym. Commands are sent to all worker processes
+before waiting for any of them, so that V-REP instances simulate their steps
+concurrently; an environment whose episode has finished is reset by its worker
+process before it replies, while the other environments keep running.
+"""
+
+import multiprocessing
+import time
+import traceback
+
+import numpy as np
+
+from vrepsim.exceptions import SimulationError
+from vrepsim.models import PioneerBot
+from vrepsim.objects import VisionSensorArray
+from vrepsim.simulator import Simulator
+
+
+class PioneerEnv(object):
+    """Environment of Pioneer P3-DX robot simulated in V-REP.
+
+    Observations are dictionaries holding distances measured by proximity
+    sensors (with distances of sensors that detect nothing set to the maximum
+    distance) and, if the name of a vision sensor is specified, an image from
+    it. Actions are velocities of wheels. Rewards and episode finished
+    statuses are computed by the specified functions taking an observation
+    and an action; episodes are also finished after the specified number of
+    steps.
+    """
+
+    def __init__(self, addr, port, bot_name, us_sensor_names, motor_names,
+                 camera_name=None, grayscale=False, max_distance=1.0,
+                 max_steps=None, reward_func=None, done_func=None,
+                 stop_timeout=5.0):
+        self._addr = addr
+        self._port = port
+        self._bot_name = bot_name
+        self._us_sensor_names = us_sensor_names
+        self._motor_names = motor_names
+        self._camera_name = camera_name
+        self._grayscale = grayscale
+        self._max_distance = max_distance
+        self._max_steps = max_steps
+        self._reward_func = reward_func
+        self._done_func = done_func
+        self._stop_timeout = stop_timeout
+        self._vrep_sim = None
+        self._bot = None
+        self._cameras = None
+        self._n_steps = 0
+
+    @property
+    def n_steps(self):
+        """Number of steps in the current episode."""
+        return self._n_steps
+
+    @property
+    def vrep_sim(self):
+        """Interface to V-REP remote API server, or None if not connected."""
+        return self._vrep_sim
+
+    def close(self):
+        """Stop V-REP simulation and disconnect from V-REP remote API
+        server.
+        """
+        if self._vrep_sim is None:
+            return
+        try:
+            if self._vrep_sim.is_sim_started():
+                self._vrep_sim.stop_sim()
+        finally:
+            self._vrep_sim.disconnect()
+            self._vrep_sim = None
+
+    def observe(self):
+        """Retrieve observation from data streamed from V-REP."""
+        distances = self._bot.us_sensors.read_distances(streaming=True)
+        distances[np.isnan(distances)] = self._max_distance
+        observation = {'distances': distances}
+        if self._cameras is not None:
+            images, _ = self._cameras.get_images(self._grayscale,
+                                                 streaming=True)
+            observation['image'] = images[0]
+        return observation
+
+    def reset(self):
+        """Start a new episode, restarting V-REP simulation, and retrieve the
+        first observation.
+        """
+        if self._vrep_sim is None:
+            self._connect()
+        vrep_sim = self._vrep_sim
+
+        # Stop V-REP simulation and wait until it is stopped
+        if vrep_sim.is_sim_started():
+            vrep_sim.stop_sim()
+            deadline = time.time() + self._stop_timeout
+            while vrep_sim.is_sim_started():
+                if time.time() > deadline:
+                    raise SimulationError("Could not reset environment: "
+                                          "V-REP simulation not stopped.")
+                time.sleep(0.01)
+
+        # Start V-REP simulation and wait for the first V-REP simulation step
+        vrep_sim.start_sim()
+        self._n_steps = 0
+        vrep_sim.trig_sim_step()
+        vrep_sim.get_ping_time()
+        return self.observe()
+
+    def step(self, action):
+        """Apply action, trigger V-REP simulation step and retrieve
+        observation, reward, episode finished status and additional
+        information.
+        """
+        self._bot.wheels.set_velocities(np.asarray(action).tolist(),
+                                        blocking=False)
+        self._vrep_sim.trig_sim_step()
+        self._vrep_sim.get_ping_time()
+        self._n_steps += 1
+        observation = self.observe()
+        reward = (self._reward_func(observation, action)
+                  if self._reward_func is not None else 0.0)
+        done = bool(self._done_func(observation, action)
+                    if self._done_func is not None else False)
+        if self._max_steps is not None and self._n_steps >= self._max_steps:
+            done = True
+        return observation, reward, done, {}
+
+    def _connect(self):
+        """Connect to V-REP remote API server and create interfaces to the
+        robot and the vision sensor.
+        """
+        vrep_sim = Simulator(self._addr, self._port)
+        vrep_sim.connect()
+        try:
+            self._bot = PioneerBot(self._bot_name, self._us_sensor_names,
+                                   self._motor_names, vrep_sim=vrep_sim)
+            if self._camera_name is not None:
+                self._cameras = VisionSensorArray([self._camera_name],
+                                                  vrep_sim=vrep_sim)
+        except Exception:
+            vrep_sim.disconnect()
+            raise
+        self._vrep_sim = vrep_sim
+
+
+def _stack(observations):
+    """Stack observations of multiple environments."""
+    if isinstance(observations[0], dict):
+        return {key: np.stack([obs[key] for obs in observations])
+                for key in observations[0]}
+    return np.stack(observations)
+
+
+def _worker(remote, parent_remote, env_func):
+    """Run environment in worker process, executing commands received from
+    the main process.
+    """
+    parent_remote.close()
+    env = None
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == 'close':
+                break
+            try:
+                if env is None:
+                    env = env_func()
+                if command == 'reset':
+                    result = env.reset()
+                elif command == 'step':
+                    observation, reward, done, info = env.step(data)
+                    if done:
+                        info = dict(info, terminal_observation=observation)
+                        observation = env.reset()
+                    result = (observation, reward, done, info)
+                else:
+                    raise ValueError("Command is not supported.")
+            except Exception:
+                remote.send(('error', traceback.format_exc()))
+            else:
+                remote.send(('ok', result))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        try:
+            if env is not None:
+                env.close()
+        finally:
+            try:
+                remote.send(('ok', None))
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+            remote.close()
+
+
+class VecEnv(object):
+    """Vectorized environment running multiple environments simulated in
+    V-REP in worker processes.
+
+    Each environment is created in its worker process by the corresponding
+    function (which must be picklable, e.g., functools.partial of an
+    environment class), and should connect to its own V-REP remote API server.
+    When an episode finishes, its final observation is stored in the
+    additional information under 'terminal_observation' and the observation
+    returned is the first one of the next episode.
+    """
+
+    def __init__(self, env_funcs, start_method=None):
+        if not env_funcs:
+            raise ValueError("Could not create vectorized environment: "
+                             "missing environments.")
+        ctx = multiprocessing.get_context(start_method)
+        self._remotes = []
+        self._processes = []
+        for env_func in env_funcs:
+            remote, work_remote = ctx.Pipe()
+            process = ctx.Process(target=_worker,
+                                  args=(work_remote, remote, env_func),
+                                  daemon=True)
+            process.start()
+            work_remote.close()
+            self._remotes.append(remote)
+            self._processes.append(process)
+        self._waiting = False
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """Retrieve number of environments."""
+        return len(self._remotes)
+
+    @property
+    def closed(self):
+        """Vectorized environment closed status."""
+        return self._closed
+
+    @property
+    def num_envs(self):
+        """Number of environments."""
+        return len(self._remotes)
+
+    def close(self, timeout=10.0):
+        """Close all environments and terminate worker processes, waiting for
+        each stage of closing at most the specified time per worker process.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            # Discard pending results and ask worker processes to close their
+            # environments, ignoring worker processes that have already exited
+            if self._waiting:
+                self._waiting = False
+                self._drain(timeout)
+            for remote in self._remotes:
+                try:
+                    remote.send(('close', None))
+                except (EOFError, OSError):
+                    pass
+            self._drain(timeout)
+        finally:
+            # Wait for worker processes to exit, terminating those that do not
+            for remote in self._remotes:
+                remote.close()
+            for process in self._processes:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+
+    def reset(self):
+        """Start new episodes in all environments and retrieve their first
+        observations stacked together.
+        """
+        self._send_all('reset', [None] * len(self._remotes))
+        return _stack(self._recv_all())
+
+    def step(self, actions):
+        """Apply actions and step all environments concurrently, retrieving
+        stacked observations, rewards, episode finished statuses and a list of
+        additional information.
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def step_async(self, actions):
+        """Send actions to all environments without waiting for them to
+        step.
+        """
+        if len(actions) != len(self._remotes):
+            raise ValueError("Number of actions does not match the number of "
+                             "environments.")
+        self._send_all('step', list(actions))
+
+    def step_wait(self):
+        """Wait for all environments to step, retrieving stacked observations,
+        rewards, episode finished statuses and a list of additional
+        information.
+        """
+        results = self._recv_all()
+        observations, rewards, dones, infos = zip(*results)
+        return (_stack(observations), np.array(rewards, dtype=float),
+                np.array(dones, dtype=bool), list(infos))
+
+    def _drain(self, timeout):
+        """Receive and discard one message from each worker process, unless
+        it has exited or does not reply in time.
+        """
+        for remote in self._remotes:
+            try:
+                if remote.poll(timeout):
+                    remote.recv()
+            except (EOFError, OSError):
+                pass
+
+    def _recv_all(self):
+        """Receive results from all worker processes."""
+        results = [remote.recv() for remote in self._remotes]
+        self._waiting = False
+        for e, (status, result) in enumerate(results):
+            if status == 'error':
+                raise SimulationError("Error in environment {0}:\n{1}"
+                                      "".format(e, result))
+        return [result for _, result in results]
+
+    def _send_all(self, command, data):
+        """Send command to all worker processes."""
+        if self._closed:
+            raise RuntimeError("Could not send command to environments: "
+                               "vectorized environment closed.")
+        if self._waiting:
+            raise RuntimeError("Could not send command to environments: "
+                               "still waiting for previous command.")
+        for remote, item in zip(self._remotes, data):
+            remote.send((command, item))
+        self._waiting = True